@@ -0,0 +1,1038 @@
+""" Small benchmarks for the todo variants, run with `python todo_benchmark.py [name ...]`
+
+`python todo_benchmark.py --suite --json run.json [--baseline base.json]` runs the
+reproducible suite instead and compares it with a saved run.
+"""
+from contextlib import redirect_stdout
+from itertools import islice
+import argparse
+import asyncio
+import io
+import json
+import multiprocessing
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import todo_oop_hassan as hassan
+import todo_oop_jamor as jamor
+
+
+SIZES = (1_000, 10_000, 100_000)
+SAMPLES = 1_000
+
+
+def fill_todo(size: int) -> hassan.Todo:
+    todo = hassan.Todo()
+    for i in range(size):
+        todo.add_task(hassan.Task(description=f"task {i}", priority=hassan.Priority.LOW))
+    return todo
+
+
+def fill_task_db(size: int) -> jamor.TaskDB:
+    task_db = jamor.TaskDB()
+    for i in range(size):
+        task_db.create(description=f"task {i}", priority=jamor.Priority.LOW).save()
+    return task_db
+
+
+def synthetic_descriptions(size: int, seed: int = 0, words: int = 5_000):
+    """ `size` descriptions of 3 to 8 words drawn from a fixed pseudo-word vocabulary """
+    rng = random.Random(seed)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    vocabulary = ["".join(rng.choice(letters) for _ in range(rng.randint(3, 9))) for _ in range(words)]
+    for _ in range(size):
+        yield " ".join(rng.choices(vocabulary, k=rng.randint(3, 8)))
+
+
+def per_op_us(func, samples: int = SAMPLES) -> float:
+    start = time.perf_counter()
+    for i in range(samples):
+        func(i)
+    return (time.perf_counter() - start) / samples * 1e6
+
+
+def bench_lookup():
+    """ lookup / insert cost (us per op) should stay flat as the list grows """
+    print(f"{'size':>10} {'by id':>10} {'by desc':>10} {'dup check':>10} {'insert':>10}")
+    for size in SIZES:
+        todo = fill_todo(size)
+        first_id = next(iter(todo.tasks))
+        step = max(size // SAMPLES, 1)
+
+        by_id = per_op_us(lambda i: todo.get_task_by_id(first_id + (i * step) % size))
+        by_desc = per_op_us(lambda i: todo.get_task_by_description(f"task {(i * step) % size}"))
+        dup = per_op_us(lambda i: todo.has_description(f"TASK {(i * step) % size}"))
+        insert = per_op_us(lambda i: todo.add_task(hassan.Task(description=f"new {i}", priority=hassan.Priority.HIGH)))
+
+        print(f"{size:>10} {by_id:>10.2f} {by_desc:>10.2f} {dup:>10.2f} {insert:>10.2f}")
+
+    print()
+    print(f"{'size':>10} {'get':>10} {'by desc':>10} {'insert':>10}")
+    for size in SIZES:
+        task_db = fill_task_db(size)
+        first_id = next(iter(task_db.tasks))
+        step = max(size // SAMPLES, 1)
+
+        by_id = per_op_us(lambda i: task_db.get(first_id + (i * step) % size))
+        by_desc = per_op_us(lambda i: task_db.get_by_description(f"task {(i * step) % size}"))
+        insert = per_op_us(lambda i: task_db.create(description=f"new {i}", priority=jamor.Priority.HIGH).save())
+
+        print(f"{size:>10} {by_id:>10.2f} {by_desc:>10.2f} {insert:>10.2f}")
+
+
+def bench_delete():
+    """ bulk delete of every task and a full lazy numbered listing (ms) """
+    print(f"{'size':>10} {'listing':>10} {'delete all':>10}")
+    for size in SIZES:
+        todo = fill_todo(size)
+
+        start = time.perf_counter()
+        for number, task in todo.get_all_tasks():
+            pass
+        listing = (time.perf_counter() - start) * 1e3
+
+        start = time.perf_counter()
+        todo.delete_tasks(list(todo.tasks))
+        delete = (time.perf_counter() - start) * 1e3
+
+        print(f"{size:>10} {listing:>10.2f} {delete:>10.2f}")
+
+
+def bench_storage():
+    """ write cost per sync mode and startup (recovery) time of LogStorage """
+    writes = 2_000
+    modes = (
+        ("always", dict(sync_mode=jamor.SyncMode.ALWAYS)),
+        ("group 64", dict(sync_mode=jamor.SyncMode.GROUP, group_size=64)),
+        ("interval 0.1s", dict(sync_mode=jamor.SyncMode.INTERVAL, interval=0.1)),
+    )
+
+    print(f"{'mode':>14} {'us/write':>10} {'fsyncs':>8} {'startup ms':>11} {'replayed':>9}")
+    for name, options in modes:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "tasks")
+
+            storage = jamor.LogStorage(path, **options)
+            task_db = jamor.TaskDB(storage=storage)
+            write = per_op_us(lambda i: task_db.create(description=f"task {i}", priority=jamor.Priority.LOW).save(), samples=writes)
+            task_db.close()
+
+            reopened = jamor.LogStorage(path, **options)
+            jamor.TaskDB(storage=reopened).close()
+
+            print(
+                f"{name:>14} {write:>10.2f} {storage.stats['fsync_count']:>8} "
+                f"{reopened.stats['startup_seconds'] * 1e3:>11.2f} {reopened.stats['replayed_records']:>9}"
+            )
+
+
+class DictTask:
+    """ the fields of `jamor.Task` in a per-instance `__dict__`, i.e. without `__slots__` """
+
+    def __init__(self, description: str, priority: jamor.Priority, status: jamor.Status = jamor.Status.NOT_STARTED):
+        self.id = jamor.Task.get_id()
+        self.description = description
+        self.priority = priority
+        self.status = status
+        self.version = 1
+        self.task_db = None
+        self.rendered = None
+
+
+def traced_mb(build) -> float:
+    tracemalloc.start()
+    kept = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return size / 2**20
+
+
+def bench_memory():
+    """ memory (MB) of 1M tasks per layout: __dict__ objects, __slots__ objects, columnar TaskStore """
+    size = 1_000_000
+    priorities = list(jamor.Priority)
+
+    # distinct descriptions, as on a real board: nothing is shared between tasks
+    def objects(cls):
+        return [cls(description=f"task {i}", priority=priorities[i % 3]) for i in range(size)]
+
+    def columns():
+        store = jamor.TaskStore()
+        for i in range(size):
+            store.append(description=f"task {i}", priority=priorities[i % 3])
+        return store
+
+    print(f"{'layout':>10} {'MB':>10} {'bytes/task':>11}")
+    for name, build in (("__dict__", lambda: objects(DictTask)), ("__slots__", lambda: objects(jamor.Task)), ("TaskStore", columns)):
+        mb = traced_mb(build)
+        print(f"{name:>10} {mb:>10.1f} {mb * 2**20 / size:>11.1f}")
+
+
+def bench_ids() -> list[str]:
+    """ task ids handed out per second by many threads, checking there is no duplicate """
+    per_thread = 100_000
+    failures = []
+
+    print(f"{'allocator':>10} {'threads':>8} {'M ids/s':>8} {'unique':>7}")
+    for name, make in (("blocks", jamor.IdAllocator), ("snowflake", jamor.SnowflakeIdAllocator)):
+        for threads in (1, 4, 8):
+            allocator = make()
+            results = [[] for _ in range(threads)]
+
+            def work(out):
+                next_id = allocator.next_id
+                out.extend(next_id() for _ in range(per_thread))
+
+            workers = [threading.Thread(target=work, args=(out,)) for out in results]
+            start = time.perf_counter()
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            elapsed = time.perf_counter() - start
+
+            ids = [id for out in results for id in out]
+            print(f"{name:>10} {threads:>8} {len(ids) / elapsed / 1e6:>8.2f} {str(len(set(ids)) == len(ids)):>7}")
+            if len(set(ids)) != len(ids):
+                failures.append(f"ids: {name} with {threads} threads handed out {len(ids) - len(set(ids))} duplicates")
+
+    return failures + check_thread_slots()
+
+
+def check_thread_slots() -> list[str]:
+    """ snowflake slots of exited threads are reused without duplicates, and are never shared by live threads """
+    allocator = jamor.SnowflakeIdAllocator()
+    slots = 1 << allocator.thread_bits
+    failures = []
+
+    # more threads than slots over time, then one running alongside this one
+    ids = [allocator.next_id()]
+    for _ in range(slots + 8):
+        worker = threading.Thread(target=lambda: ids.append(allocator.next_id()))
+        worker.start()
+        worker.join()
+
+    out = []
+    worker = threading.Thread(target=lambda: out.extend(allocator.next_id() for _ in range(100_000)))
+    worker.start()
+    ids += [allocator.next_id() for _ in range(100_000)]
+    worker.join()
+
+    ids += out
+    if len(set(ids)) != len(ids):
+        failures.append(f"ids: reused snowflake slots handed out {len(ids) - len(set(ids))} duplicates")
+
+    # one live thread more than there are slots
+    allocator = jamor.SnowflakeIdAllocator()
+    barrier = threading.Barrier(slots + 1)
+    refused = []
+
+    def hold():
+        try:
+            allocator.next_id()
+        except RuntimeError:
+            refused.append(True)
+        barrier.wait()
+
+    workers = [threading.Thread(target=hold) for _ in range(slots + 1)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    if len(refused) != 1:
+        failures.append(f"ids: {slots + 1} live threads over {slots} snowflake slots, {len(refused)} refused")
+
+    return failures
+
+
+def bench_import():
+    """ streaming import / export of JSON Lines and CSV files (rows per second) """
+    rows = 500_000
+
+    print(f"{'format':>8} {'rows':>9} {'import/s':>10} {'export/s':>10} {'rejected':>9}")
+    for format in jamor.TaskFile.formats:
+        with tempfile.TemporaryDirectory() as tmp:
+            source = jamor.TaskStore()
+            for i in range(rows):
+                source.append(description=f"task {i}", priority=jamor.Priority(i % 3))
+
+            path = os.path.join(tmp, f"tasks.{format}")
+            start = time.perf_counter()
+            jamor.TaskFile(path).export_from(source)
+            export = rows / (time.perf_counter() - start)
+
+            task_db = jamor.TaskDB()
+            task_file = jamor.TaskFile(path)
+            start = time.perf_counter()
+            task_file.import_into(task_db)
+            imported = task_file.imported / (time.perf_counter() - start)
+
+            print(f"{format:>8} {rows:>9} {imported:>10.0f} {export:>10.0f} {len(task_file.rejected):>9}")
+
+
+def bench_update() -> list[str]:
+    """ cost per update (us) of the batch update API, should not depend on the list size """
+    batch = 10_000
+    priorities = list(hassan.Priority)
+
+    print(f"{'size':>10} {'Todo':>10} {'TaskDB':>10}")
+    for size in SIZES:
+        todo = fill_todo(size)
+        ids = list(islice(todo.tasks, 0, size, max(size // batch, 1)))
+        changes = {id: {"priority": priorities[i % 3], "description": f"updated {i}"} for i, id in enumerate(ids)}
+        start = time.perf_counter()
+        todo.update_tasks(changes)
+        per_todo = (time.perf_counter() - start) / len(ids) * 1e6
+
+        task_db = fill_task_db(size)
+        ids = list(islice(task_db.tasks, 0, size, max(size // batch, 1)))
+        changes = {id: {"priority": i % 3, "status": jamor.Status.DONE} for i, id in enumerate(ids)}
+        start = time.perf_counter()
+        task_db.update_tasks(changes)
+        per_db = (time.perf_counter() - start) / len(ids) * 1e6
+
+        print(f"{size:>10} {per_todo:>10.2f} {per_db:>10.2f}")
+
+    return check_rejected_update()
+
+
+def check_rejected_update() -> list[str]:
+    """ an update with one invalid field must leave the task, its index buckets and the log untouched """
+    failures = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "tasks")
+        task_db = jamor.TaskDB(storage=jamor.LogStorage(path))
+        task = task_db.create(description="old", priority=jamor.Priority.LOW).save()
+        log_size = os.path.getsize(path + ".log")
+
+        try:
+            task_db.update_task(task, description="new", priority="HIGH")
+            failures.append("update: a priority given as a string was accepted")
+        except ValueError:
+            pass
+
+        if (task.description, task.priority, task.version) != ("old", jamor.Priority.LOW, 1):
+            failures.append(f"update: the rejected update changed the task to {task.to_dict()}")
+        if task_db.get_by_description("old") is not task or task_db.has_description("new"):
+            failures.append("update: the rejected update moved the task in the description index")
+        if task_db.query(priority=jamor.Priority.LOW) != [task]:
+            failures.append("update: the rejected update moved the task in the state index")
+        if os.path.getsize(path + ".log") != log_size:
+            failures.append("update: the rejected update was written to the log")
+        task_db.close()
+
+        reloaded = jamor.TaskDB(storage=jamor.LogStorage(path))
+        if reloaded.get(task.id).to_dict() != task.to_dict():
+            failures.append(f"update: reloaded {reloaded.get(task.id).to_dict()}, memory had {task.to_dict()}")
+        reloaded.close()
+
+    return failures
+
+
+def bench_query():
+    """ query(status=not done, priority=HIGH, limit=50) served from the bucket indexes (us per query) """
+    not_done = (jamor.Status.NOT_STARTED, jamor.Status.IN_PROGRESS)
+
+    print(f"{'size':>10} {'query':>10} {'after update':>13}")
+    for size in (10_000, 100_000, 1_000_000):
+        task_db = jamor.TaskDB()
+        task_db.add_tasks(
+            jamor.Task(description=f"task {i}", priority=jamor.Priority(i % 3), status=jamor.Status(i % 3 // 2 * 2))
+            for i in range(size)
+        )
+        query = per_op_us(lambda i: task_db.query(status=not_done, priority=jamor.Priority.HIGH, limit=50))
+
+        # move tasks in and out of the HIGH bucket, the indexes follow
+        task_db.update_tasks({id: {"priority": jamor.Priority.LOW} for id in islice(task_db.tasks, 0, size, 2)})
+        after = per_op_us(lambda i: task_db.query(status=not_done, priority=jamor.Priority.HIGH, limit=50))
+
+        print(f"{size:>10} {query:>10.2f} {after:>13.2f}")
+
+
+def bench_search():
+    """ full-text search over task descriptions (ms per query) """
+    queries = [" ".join(words) for words in zip(*[iter(" ".join(synthetic_descriptions(200)).split())] * 2)][:100]
+
+    print(f"{'size':>10} {'build s':>8} {'2 words':>8} {'prefix':>8} {'exact':>8}")
+    for size in (10_000, 100_000, 1_000_000):
+        task_db = jamor.TaskDB()
+        task_db.add_tasks(jamor.Task(description=description, priority=jamor.Priority.LOW) for description in synthetic_descriptions(size))
+
+        start = time.perf_counter()
+        index = jamor.SearchIndex(task_db)
+        build = time.perf_counter() - start
+
+        words = per_op_us(lambda i: index.search(queries[i % len(queries)]), samples=100) / 1e3
+        prefix = per_op_us(lambda i: index.search(queries[i % len(queries)][:3]), samples=100) / 1e3
+        exact = per_op_us(lambda i: index.search(queries[i % len(queries)], prefix=False), samples=100) / 1e3
+
+        print(f"{size:>10} {build:>8.2f} {words:>8.2f} {prefix:>8.2f} {exact:>8.2f}")
+
+
+def bench_duplicates():
+    """ near-duplicate check of a new description (ms per check, threshold 0.7) """
+    probes = [description[:-1] + "x" for description in synthetic_descriptions(100)]
+
+    print(f"{'size':>10} {'build s':>8} {'check':>8} {'found':>6}")
+    for size in (10_000, 100_000, 300_000):
+        task_db = jamor.TaskDB()
+        task_db.add_tasks(jamor.Task(description=description, priority=jamor.Priority.LOW) for description in synthetic_descriptions(size))
+
+        start = time.perf_counter()
+        detector = jamor.DuplicateDetector(task_db)
+        build = time.perf_counter() - start
+
+        check = per_op_us(lambda i: detector.similar(probes[i % len(probes)]), samples=100) / 1e3
+        found = sum(bool(detector.similar(probe)) for probe in probes)
+
+        print(f"{size:>10} {build:>8.2f} {check:>8.2f} {found:>6}")
+
+
+def percentile(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[min(int(q * len(values)), len(values) - 1)]
+
+
+async def http_client(port: int, requests: list, latencies: list):
+    """ one keep-alive connection sending `requests` one after the other """
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+
+    for method, path, body in requests:
+        payload = json.dumps(body).encode() if body is not None else b""
+        start = time.perf_counter()
+        writer.write(f"{method} {path} HTTP/1.1\r\nHost: bench\r\nContent-Length: {len(payload)}\r\n\r\n".encode() + payload)
+
+        await reader.readline()
+        length = 0
+        while (line := await reader.readline()) != b"\r\n":
+            if line.lower().startswith(b"content-length:"):
+                length = int(line.split(b":")[1])
+        await reader.readexactly(length)
+        latencies.append(time.perf_counter() - start)
+
+    writer.close()
+
+
+def bench_web():
+    """ WebInterface on one core driven by keep-alive clients (requests/s, p50/p99 latency in ms) """
+    connections, per_connection = 50, 200
+
+    task_db = jamor.TaskDB()
+    task_db.add_tasks(jamor.Task(description=f"task {i}", priority=jamor.Priority(i % 3)) for i in range(10_000))
+    ids = list(task_db.tasks)
+
+    web = jamor.WebInterface(task_db=task_db, port=0)
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(web.open())
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+
+    mixes = {
+        "get": lambda i: ("GET", f"/tasks/{ids[i % len(ids)]}", None),
+        "list": lambda i: ("GET", "/tasks?priority=HIGH&status=NOT_STARTED&limit=20", None),
+        "create": lambda i: ("POST", "/tasks", {"description": f"web {i}", "priority": "LOW"}),
+        "update": lambda i: ("PATCH", f"/tasks/{ids[i % len(ids)]}", {"priority": "HIGH"}),
+        "batch x10": lambda i: ("POST", "/batch", [{"method": "GET", "path": f"/tasks/{ids[(i + k) % len(ids)]}"} for k in range(10)]),
+    }
+
+    print(f"{'requests':>10} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, make in mixes.items():
+        latencies = []
+
+        async def drive():
+            await asyncio.gather(*(
+                http_client(web.port, [make(c * per_connection + i) for i in range(per_connection)], latencies)
+                for c in range(connections)
+            ))
+
+        start = time.perf_counter()
+        asyncio.run(drive())
+        elapsed = time.perf_counter() - start
+
+        print(f"{name:>10} {len(latencies) / elapsed:>8.0f} {percentile(latencies, 0.5) * 1e3:>8.2f} {percentile(latencies, 0.99) * 1e3:>8.2f}")
+
+    loop.call_soon_threadsafe(loop.stop)
+
+
+def web_client_process(port: int, requests: list) -> list:
+    latencies = []
+
+    async def drive():
+        connections = 25
+        await asyncio.gather(*(http_client(port, requests[c::connections], latencies) for c in range(connections)))
+
+    asyncio.run(drive())
+    return latencies
+
+
+def bench_workers():
+    """ WebInterface over one SQLite file with 1, 2 and 4 worker processes (90% reads / 10% writes) """
+    clients, per_client = 4, 2_000
+
+    print(f"{'workers':>8} {'cores':>6} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for workers in (1, 2, 4):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "tasks.sqlite")
+            task_db = jamor.SQLiteTaskDB(path)
+            task_db.add_tasks(jamor.Task(description=f"task {i}", priority=jamor.Priority(i % 3)) for i in range(10_000))
+            ids = [task.id for task in task_db.list()]
+
+            web = jamor.WebInterface(task_db=task_db, port=0)
+            sock = web.bind()
+            server = threading.Thread(target=web.run_workers, args=(workers, sock), daemon=True)
+            server.start()
+            time.sleep(0.5)
+
+            def requests(seed):
+                rng = random.Random(seed)
+                for i in range(per_client):
+                    id = rng.choice(ids)
+                    if i % 10:
+                        yield ("GET", f"/tasks/{id}", None)
+                    else:
+                        yield ("PATCH", f"/tasks/{id}", {"status": "IN_PROGRESS"})
+
+            context = multiprocessing.get_context("fork")
+            with context.Pool(clients) as pool:
+                start = time.perf_counter()
+                results = pool.starmap(web_client_process, [(web.port, list(requests(seed))) for seed in range(clients)])
+                elapsed = time.perf_counter() - start
+
+            web.stop_workers()
+            server.join()
+
+            latencies = [latency for result in results for latency in result]
+            print(
+                f"{workers:>8} {os.cpu_count():>6} {len(latencies) / elapsed:>8.0f} "
+                f"{percentile(latencies, 0.5) * 1e3:>8.2f} {percentile(latencies, 0.99) * 1e3:>8.2f}"
+            )
+
+
+def bench_mapped():
+    """ binary task file opened with mmap: open time, page of 50 tasks, get by id, full checksum """
+    print(f"{'size':>10} {'MB':>7} {'write s':>8} {'open us':>8} {'page us':>8} {'get us':>8} {'verify ms':>10}")
+    for size in (100_000, 1_000_000, 3_000_000):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "tasks.bin")
+
+            store = jamor.TaskStore()
+            for description in synthetic_descriptions(size):
+                store.append(description=description, priority=jamor.Priority.LOW)
+
+            start = time.perf_counter()
+            jamor.MappedTaskDB.write(path, store)
+            write = time.perf_counter() - start
+            del store
+
+            start = time.perf_counter()
+            task_db = jamor.MappedTaskDB(path)
+            opened = (time.perf_counter() - start) * 1e6
+
+            first = task_db.row_id(0)
+            page = per_op_us(lambda i: task_db.page(offset=(i * 7919) % size, limit=50), samples=100)
+            get = per_op_us(lambda i: task_db.get(first + (i * 7919) % size))
+
+            start = time.perf_counter()
+            task_db.verify()
+            verify = (time.perf_counter() - start) * 1e3
+
+            print(f"{size:>10} {os.path.getsize(path) / 2**20:>7.1f} {write:>8.2f} {opened:>8.1f} {page:>8.1f} {get:>8.2f} {verify:>10.2f}")
+            task_db.close()
+
+
+def peak_mb(func) -> float:
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 2**20
+
+
+def bench_render():
+    """ listing to /dev/null: one joined string of every task vs a drawn page of 20 (peak MB, ms) """
+    print(f"{'size':>10} {'join MB':>8} {'join ms':>8} {'page MB':>8} {'page ms':>8}")
+    with open(os.devnull, "w") as devnull:
+        logger = jamor.CMDLogger()
+        for size in SIZES:
+            task_db = fill_task_db(size)
+
+            def joined():
+                devnull.write("\n".join([repr(task) for task in task_db.list()]))
+
+            def paged():
+                cursor = jamor.TaskCursor(task_db, page_size=20)
+                cursor.offset = size // 2
+                stdout, sys.stdout = sys.stdout, devnull
+                try:
+                    logger.clear()
+                    logger.write_lines(repr(task) for task in cursor.page())
+                    logger.show()
+                finally:
+                    sys.stdout = stdout
+
+            results = []
+            for func in (joined, paged):
+                start = time.perf_counter()
+                func()
+                elapsed = (time.perf_counter() - start) * 1e3
+                results += [peak_mb(func), elapsed]
+
+            print(f"{size:>10} {results[0]:>8.2f} {results[1]:>8.2f} {results[2]:>8.3f} {results[3]:>8.2f}")
+
+
+def bench_repr():
+    """ listing 100k tasks: formatting every repr vs cached reprs, then with 1% of the tasks updated (ms) """
+    size = 100_000
+    task_db, todo = fill_task_db(size), fill_todo(size)
+
+    def listing(tasks) -> float:
+        start = time.perf_counter()
+        for task in tasks:
+            repr(task)
+        return (time.perf_counter() - start) * 1e3
+
+    print(f"{'variant':>8} {'first ms':>9} {'cached ms':>10} {'1% updated ms':>14}")
+    for name, tasks, update in (
+        ("jamor", list(task_db.list()), lambda task: task_db.apply_update(task, status=jamor.Status.DONE)),
+        ("hassan", list(todo.tasks.values()), lambda task: todo.apply_update(task, task_status=hassan.Status.DONE)),
+    ):
+        first, cached = listing(tasks), listing(tasks)
+        for task in tasks[::100]:
+            update(task)
+
+        print(f"{name:>8} {first:>9.1f} {cached:>10.1f} {listing(tasks):>14.1f}")
+
+
+def bench_versions() -> list[str]:
+    """ threads incrementing one shared counter task: blind read-modify-write vs compare-and-set retries """
+    threads, increments = 8, 2_000
+    failures = []
+
+    def run(task_db: jamor.TaskDB, checked: bool) -> tuple[int, int, float]:
+        id = task_db.create("0", jamor.Priority.LOW).save().id
+        conflicts = []
+
+        def increment():
+            retried = 0
+            for _ in range(increments):
+                while True:
+                    task = task_db.get(id)
+                    # version first: it is bumped after the fields it guards
+                    version = task.version
+                    value = int(task.description)
+                    try:
+                        task_db.update_task(task, description=str(value + 1), expected_version=version if checked else None)
+                        break
+                    except jamor.VersionConflictError:
+                        retried += 1
+            conflicts.append(retried)
+
+        workers = [threading.Thread(target=increment) for _ in range(threads)]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+
+        return int(task_db.get(id).description), sum(conflicts), elapsed
+
+    previous = sys.getswitchinterval()
+    # switch threads often, so read-modify-write races show up
+    sys.setswitchinterval(1e-6)
+    try:
+        print(f"{'db':>8} {'mode':>6} {'expected':>9} {'final':>7} {'lost':>6} {'retries':>8} {'ops/s':>8}")
+        with tempfile.TemporaryDirectory() as tmp:
+            for name, build in (("memory", jamor.TaskDB), ("sqlite", lambda: jamor.SQLiteTaskDB(os.path.join(tmp, "tasks.sqlite")))):
+                for mode, checked in (("blind", False), ("cas", True)):
+                    task_db = build()
+                    final, retries, elapsed = run(task_db, checked)
+                    expected = threads * increments
+                    print(f"{name:>8} {mode:>6} {expected:>9} {final:>7} {expected - final:>6} {retries:>8} {expected / elapsed:>8.0f}")
+                    task_db.close()
+
+                    # blind updates are expected to lose some, compare-and-set must not
+                    if checked and final != expected:
+                        failures.append(f"versions: compare-and-set on {name} lost {expected - final} of {expected} updates")
+    finally:
+        sys.setswitchinterval(previous)
+
+    return failures
+
+
+def bench_screen():
+    """ cost of one menu redraw (us): spawning `clear` vs ANSI frames, whole or diffed against the last one """
+    logger = jamor.CMDLogger()
+    menu = logger.messages["menu_options"].split("\n")
+    samples = 200
+
+    with open(os.devnull, "w") as devnull:
+        stdout, sys.stdout = sys.stdout, devnull
+        try:
+            spawn = per_op_us(lambda i: os.system("clear >/dev/null 2>&1"), samples=samples)
+
+            terminal = jamor.Terminal()
+
+            def whole(i):
+                terminal.rows = None
+                terminal.draw(menu)
+
+            unchanged = per_op_us(lambda i: terminal.draw(menu), samples=samples)
+            full = per_op_us(whole, samples=samples)
+            one_row = per_op_us(lambda i: terminal.draw(menu[:-2] + [f"Invalid Option {i}", menu[-1]]), samples=samples)
+
+            # bytes sent to the terminal per frame
+            sizes = []
+            for draw in (whole, lambda i: terminal.draw(menu), lambda i: terminal.draw(menu[:-2] + ["Invalid Option", menu[-1]])):
+                sys.stdout = io.StringIO()
+                draw(0)
+                sizes.append(len(sys.stdout.getvalue()))
+        finally:
+            sys.stdout = stdout
+
+    print(f"{'':>6} {'os.system':>10} {'whole':>10} {'unchanged':>10} {'one row':>10}")
+    print(f"{'us':>6} {spawn:>10.1f} {full:>10.1f} {unchanged:>10.1f} {one_row:>10.1f}")
+    print(f"{'bytes':>6} {'-':>10} {sizes[0]:>10} {sizes[1]:>10} {sizes[2]:>10}")
+
+
+def bench_batch() -> list[str]:
+    """ headless command stream (JSON lines in, JSON lines out) vs the library calls it stands for (commands/s) """
+    size = 200_000
+    batch = jamor.BatchInterface.batch_size
+
+    library = jamor.TaskDB()
+    start = time.perf_counter()
+    for i in range(0, size, batch):
+        library.add_tasks([jamor.Task(description=f"task {j}", priority=jamor.Priority.HIGH) for j in range(i, i + batch)])
+    library_add = size / (time.perf_counter() - start)
+
+    ids = list(library.tasks)
+    start = time.perf_counter()
+    for i in range(0, size, batch):
+        library.update_tasks([(id, {"status": jamor.Status.DONE}) for id in ids[i:i + batch]])
+    library_update = size / (time.perf_counter() - start)
+
+    with open(os.devnull, "w") as devnull:
+        interface = jamor.BatchInterface(jamor.TaskDB(), out=devnull)
+
+        adds = [json.dumps({"op": "add", "description": f"task {i}", "priority": "HIGH"}) for i in range(size)]
+        start = time.perf_counter()
+        interface.execute(interface.read(adds))
+        stream_add = size / (time.perf_counter() - start)
+
+        updates = [json.dumps({"op": "update", "id": id, "status": "DONE"}) for id in interface.task_db.tasks]
+        start = time.perf_counter()
+        interface.execute(interface.read(updates))
+        stream_update = size / (time.perf_counter() - start)
+
+        # the argv form goes through argparse, once per line
+        texts = [f"update {id} --status IN_PROGRESS" for id in interface.task_db.tasks]
+        start = time.perf_counter()
+        interface.execute(interface.read(texts))
+        stream_text = size / (time.perf_counter() - start)
+
+    print(f"{'command':>8} {'library/s':>10} {'json/s':>10} {'text/s':>10}")
+    print(f"{'add':>8} {library_add:>10.0f} {stream_add:>10.0f} {'-':>10}")
+    print(f"{'update':>8} {library_update:>10.0f} {stream_update:>10.0f} {stream_text:>10.0f}")
+
+    return check_batch_help()
+
+
+def check_batch_help() -> list[str]:
+    """ `-h` in the middle of a stream is one failed command: the stream goes on and nothing staged is lost """
+    lines = ["add first --priority HIGH", "list -h", "add second --priority LOW", '{"op": "list"}']
+    failures = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "commands.txt")
+        with open(path, "w") as file:
+            file.write("\n".join(lines) + "\n")
+
+        out = io.StringIO()
+        status = jamor.BatchInterface(jamor.TaskDB(), out=out).run(["run", path])
+
+    results = [json.loads(line) for line in out.getvalue().splitlines()]
+    if [result["ok"] for result in results] != [True, False, True, True]:
+        failures.append(f"batch: `-h` mid-stream gave {out.getvalue()!r}")
+    elif [task["description"] for task in results[-1]["tasks"]] != ["first", "second"]:
+        failures.append(f"batch: `-h` mid-stream lost staged tasks, listed {results[-1]['tasks']}")
+    if status != 1:
+        failures.append(f"batch: a stream with a failed command exited with status {status}")
+
+    return failures
+
+
+def bench_table():
+    """ virtualized task table over 1M tasks: fetching the row index, drawing a screen of 40 rows (ms, peak MB) """
+    size = 1_000_000
+    screens = 1000
+
+    task_db = jamor.TaskDB()
+    task_db.add_tasks([jamor.Task(description=f"task {i}", priority=jamor.Priority(i % 3)) for i in range(size)])
+
+    tracemalloc.start()
+    rows = jamor.TaskRows(task_db)
+    start = time.perf_counter()
+    while rows.can_fetch():
+        rows.fetch()
+    fetch = (time.perf_counter() - start) * 1e3
+
+    start = time.perf_counter()
+    for top in range(0, size - 40, size // screens):
+        for row in range(top, top + 40):
+            rows.values(row)
+    draw = (time.perf_counter() - start) / screens * 1e3
+    peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    rows.close()
+
+    print(f"{'':>8} {'fetch ms':>9} {'screen ms':>10} {'peak MB':>8}")
+    print(f"{'rows':>8} {fetch:>9.1f} {draw:>10.3f} {peak:>8.1f}")
+
+    if jamor.QtWidgets is None:
+        print("(no Qt binding, the table view is skipped)")
+        return
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    app = jamor.QtWidgets.QApplication.instance() or jamor.QtWidgets.QApplication([])
+    interface = jamor.QTInterface(task_db)
+    interface.build().show()
+    app.processEvents()
+
+    scroll = interface.table.verticalScrollBar()
+    start = time.perf_counter()
+    while interface.model.canFetchMore(jamor.QtCore.QModelIndex()):
+        interface.model.fetchMore(jamor.QtCore.QModelIndex())
+    fetch = (time.perf_counter() - start) * 1e3
+    app.processEvents()
+
+    values = range(0, scroll.maximum(), max(scroll.maximum() // screens, 1))
+    start = time.perf_counter()
+    for value in values:
+        scroll.setValue(value)
+        interface.table.viewport().repaint()
+    draw = (time.perf_counter() - start) / max(len(values), 1) * 1e3
+    interface.model.close()
+
+    print(f"{'view':>8} {fetch:>9.1f} {draw:>10.3f} {'-':>8}")
+
+
+BENCHMARKS = {
+    "lookup": bench_lookup,
+    "delete": bench_delete,
+    "storage": bench_storage,
+    "memory": bench_memory,
+    "ids": bench_ids,
+    "import": bench_import,
+    "update": bench_update,
+    "query": bench_query,
+    "search": bench_search,
+    "duplicates": bench_duplicates,
+    "web": bench_web,
+    "workers": bench_workers,
+    "mapped": bench_mapped,
+    "render": bench_render,
+    "repr": bench_repr,
+    "versions": bench_versions,
+    "screen": bench_screen,
+    "batch": bench_batch,
+    "table": bench_table,
+}
+
+
+SUITE_SIZES = (1_000, 100_000, 1_000_000)
+SUITE_SAMPLES = 10_000
+
+
+def timed(func, samples: int) -> dict:
+    """ calls `func(i)` for i in range(samples): throughput and latency percentiles """
+    clock = time.perf_counter
+    latencies = []
+
+    start = clock()
+    for i in range(samples):
+        began = clock()
+        func(i)
+        latencies.append(clock() - began)
+    elapsed = clock() - start
+
+    return {
+        "samples": samples,
+        "ops_per_s": samples / elapsed,
+        "p50_us": percentile(latencies, 0.50) * 1e6,
+        "p99_us": percentile(latencies, 0.99) * 1e6,
+    }
+
+
+def suite_ops(size: int, seed: int):
+    """ yields `(name, func, samples, setup)` for one board size; `setup()` returns a fresh
+    `func` for the repeated and traced runs when the timed one changes the board (inserts) """
+    rng = random.Random(seed)
+    descriptions = list(synthetic_descriptions(size, seed=seed))
+    priorities = [rng.randrange(3) for _ in range(size)]
+
+    hassan_priorities, jamor_priorities = list(hassan.Priority), list(jamor.Priority)
+
+    def building_todo():
+        todo = hassan.Todo()
+        return todo, lambda i: todo.add_task(hassan.Task(description=descriptions[i], priority=hassan_priorities[priorities[i]]))
+
+    def building_task_db():
+        task_db = jamor.TaskDB()
+        return task_db, lambda i: task_db.create(description=descriptions[i], priority=jamor_priorities[priorities[i]]).save()
+
+    todo, add = building_todo()
+    yield "todo.add_task", add, size, lambda: building_todo()[1]
+
+    samples = min(size, SUITE_SAMPLES)
+    ids = list(todo.tasks)
+    picked = [rng.randrange(size) for _ in range(samples)]
+
+    yield "todo.get_task_by_id", lambda i: todo.get_task_by_id(ids[picked[i]]), samples, None
+    yield "todo.get_task_by_description", lambda i: todo.get_task_by_description(descriptions[picked[i]]), samples, None
+    yield "todo.update_task", lambda i: todo.update_task(
+        todo.tasks[ids[picked[i]]], task_status=hassan.Status(picked[i] % 3 + 1)
+    ), samples, None
+    yield "todo.show_tasks", lambda i: todo.show_tasks(start=picked[i], count=20), min(samples, 200), None
+
+    task_db, create = building_task_db()
+    yield "task_db.create.save", create, size, lambda: building_task_db()[1]
+
+    logger = jamor.CMDLogger()
+
+    def list_page(i):
+        cursor = jamor.TaskCursor(task_db, page_size=20)
+        cursor.offset = picked[i]
+        logger.clear()
+        logger.write_lines(repr(task) for task in cursor.page())
+        logger.show()
+
+    yield "cmd.list_page", list_page, min(samples, 200), None
+    yield "task_db.repr", lambda i: repr(task_db), 20 if size <= 100_000 else 3, None
+
+
+def best(passes: list[dict]) -> dict:
+    """ the best value of each metric over the timed passes """
+    return {
+        "samples": passes[0]["samples"],
+        "ops_per_s": max(timing["ops_per_s"] for timing in passes),
+        "p50_us": min(timing["p50_us"] for timing in passes),
+        "p99_us": min(timing["p99_us"] for timing in passes),
+    }
+
+
+def run_suite(sizes, seed: int = 0, repeat: int = 3) -> dict:
+    """ every op is timed `repeat` times, inserts on a fresh board each time, and the best pass is kept """
+    results = []
+
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        for size in sizes:
+            for name, func, samples, setup in suite_ops(size, seed):
+                # the first insert pass fills the board the next ops read
+                passes = [timed(func, samples)]
+                passes += [timed(setup() if setup is not None else func, samples) for _ in range(repeat - 1)]
+                result = {"op": name, "size": size, **best(passes)}
+
+                # an insert is traced over the whole board, a read-only op over a few calls
+                traced, calls_traced = (setup(), samples) if setup is not None else (func, min(samples, 100))
+
+                def calls():
+                    for i in range(calls_traced):
+                        traced(i)
+
+                result["peak_mb"] = peak_mb(calls)
+
+                results.append(result)
+                print(json.dumps(result), file=sys.stderr)
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": seed,
+        "sizes": list(sizes),
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+# changes below these are noise, whatever their ratio
+NOISE = {"p99_us": 20.0, "peak_mb": 1.0}
+
+
+def compare(run: dict, baseline: dict, tolerance: float) -> list[str]:
+    """ prints `run` against `baseline` and returns the regressions beyond `tolerance` (0.25 = 25%) """
+    before = {(result["op"], result["size"]): result for result in baseline["results"]}
+    regressions = []
+
+    print(f"{'op':>30} {'size':>9} {'ops/s':>10} {'vs base':>8} {'p99 us':>9} {'vs base':>8} {'peak MB':>8} {'vs base':>8}")
+    for result in run["results"]:
+        base = before.get((result["op"], result["size"]))
+        if base is None:
+            continue
+
+        # how much worse each metric got, as a fraction: slower, later, bigger
+        changes = {
+            "ops_per_s": base["ops_per_s"] / result["ops_per_s"] - 1,
+            "p99_us": (result["p99_us"] - base["p99_us"]) / max(base["p99_us"], NOISE["p99_us"]),
+            "peak_mb": (result["peak_mb"] - base["peak_mb"]) / max(base["peak_mb"], NOISE["peak_mb"]),
+        }
+        flagged = [metric for metric, change in changes.items() if change > tolerance]
+        regressions += [
+            f"{result['op']}@{result['size']} {metric}: {base[metric]:.2f} -> {result[metric]:.2f}" for metric in flagged
+        ]
+
+        print(f"{result['op']:>30} {result['size']:>9}", end="")
+        for metric, width, digits in (("ops_per_s", 10, 0), ("p99_us", 9, 1), ("peak_mb", 8, 2)):
+            print(f" {result[metric]:>{width}.{digits}f} {result[metric] / max(base[metric], 1e-9) - 1:>+8.0%}", end="")
+        print("  REGRESSION" if flagged else "")
+
+    return regressions
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("names", nargs="*", help=f"benchmarks to run, out of: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--suite", action="store_true", help="run the reproducible suite instead")
+    parser.add_argument("--sizes", default=",".join(map(str, SUITE_SIZES)), help="suite board sizes, comma separated")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the suite data generator")
+    parser.add_argument("--repeat", type=int, default=3, help="timed passes of each suite op")
+    parser.add_argument("--json", metavar="PATH", help="write the suite results to PATH")
+    parser.add_argument("--baseline", metavar="PATH", help="saved suite results to compare with, exits 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown / growth before a regression")
+    args = parser.parse_args()
+
+    if args.suite:
+        run = run_suite([int(size) for size in args.sizes.split(",")], seed=args.seed, repeat=args.repeat)
+
+        if args.json:
+            with open(args.json, "w") as file:
+                json.dump(run, file, indent=2)
+
+        if args.baseline:
+            with open(args.baseline) as file:
+                regressions = compare(run, json.load(file), args.tolerance)
+            if regressions:
+                print("\nregressions:\n  " + "\n  ".join(regressions))
+                sys.exit(1)
+
+        sys.exit()
+
+    # a benchmark that also checks a property returns what it found broken
+    failures = []
+    for name in args.names or list(BENCHMARKS):
+        print(f"== {name}: {BENCHMARKS[name].__doc__.strip()}")
+        failures += BENCHMARKS[name]() or []
+        print()
+
+    if failures:
+        print("failures:\n  " + "\n  ".join(failures))
+        sys.exit(1)
@@ -1,5 +1,7 @@
 from enum import Enum, auto
+from itertools import chain, count, islice
 import os
+import sys
 
 class Status(Enum):
     """
@@ -48,7 +50,10 @@ class UpdatingMessage(Enum):
 
 class Task:
 
-    id_counter: int = 0
+    __slots__ = ("id", "description", "priority", "status", "rendered")
+
+    # `next()` on a count is atomic, unlike `id_counter += 1`
+    id_counter = count(1)
 
     description: str
     priority: Priority
@@ -64,66 +69,183 @@ class Task:
         self.set_priority(priority=priority)
 
         self.status = status
+        self.invalidate()
         
     def set_description(self, description: str):
         if not isinstance(description, str):
             raise ValueError(f"'desciption' must be a string, but {type(description)} is found.")
 
         self.description = description
+        self.invalidate()
 
     def set_priority(self, priority: Priority):
         if not isinstance(priority, Priority):
             raise ValueError(f"'priority' must be a Priority instance, but {type(priority)} is found.")
 
         self.priority = priority
+        self.invalidate()
+
+    def invalidate(self):
+        """ drops the cached `__repr__`, to call after any field change """
+        self.rendered = None
 
     def __repr__(self) -> str: 
-        return f"Task(id={self.id}, description={self.description}, priority={self.priority}, status={self.status})"
+        if self.rendered is None:
+            self.rendered = f"Task(id={self.id}, description={self.description}, priority={self.priority}, status={self.status})"
+        return self.rendered
     
     def get_id(self):
-        Task.id_counter += 1
-        return Task.id_counter
+        return next(Task.id_counter)
 
 
 
 class Todo:
 
     def __init__(self):
-        self.tasks: list[Task] = []
+        # tasks keyed by id, in insertion order
+        self.tasks: dict[int, Task] = {}
+
+        # indexes kept in sync with `self.tasks`
+        self.tasks_by_description: dict[str, dict[int, Task]] = {}
+        self.tasks_by_state: dict[tuple[Status, Priority], dict[int, Task]] = {}
+
+    @staticmethod
+    def description_key(description: str) -> str:
+        return description.casefold()
+
+    @staticmethod
+    def pop_from_bucket(buckets: dict, key, task: Task):
+        bucket = buckets.get(key)
+        if bucket is not None:
+            bucket.pop(task.id, None)
+            if not bucket:
+                del buckets[key]
+
+    def index_task(self, task: Task):
+        self.tasks_by_description.setdefault(self.description_key(task.description), {})[task.id] = task
+        self.tasks_by_state.setdefault((task.status, task.priority), {})[task.id] = task
+
+    def unindex_task(self, task: Task):
+        self.pop_from_bucket(self.tasks_by_description, self.description_key(task.description), task)
+        self.pop_from_bucket(self.tasks_by_state, (task.status, task.priority), task)
 
     def add_task(self, task: Task):
-        self.tasks.append(task)
+        self.tasks[task.id] = task
+        self.index_task(task)
     
     def get_all_tasks(self):
-        return [(i + 1, task) for i, task in enumerate(self.tasks)]
+        """ lazy `(number, task)` view, numbered from 1 in insertion order """
+        return enumerate(self.tasks.values(), start=1)
+
+    def get_task_by_number(self, number: int):
+        if not 1 <= number <= len(self.tasks):
+            return None
+        return next(islice(self.tasks.values(), number - 1, None))
 
     def get_task_by_id(self, id: int):
-        for task in self.tasks:
-            if id == task.id:
-                return task
+        return self.tasks.get(id)
     
     def get_task_by_description(self, description: str):
-        for task in self.tasks:
+        for task in self.tasks_by_description.get(self.description_key(description), {}).values():
             if description == task.description:
                 return task
 
-    def show_tasks(self):
-        for task in self.get_all_tasks():
-            print(f"Task number {task[0]} :", task[1])
+    def has_description(self, description: str) -> bool:
+        """ case-insensitive check, used to reject duplicated tasks """
+        return self.description_key(description) in self.tasks_by_description
+
+    def delete_task(self, id: int):
+        task = self.tasks.get(id)
+        if task is None:
+            return None
+        self.unindex_task(task)
+        del self.tasks[id]
+        return task
+
+    def delete_tasks(self, ids):
+        return [task for task in map(self.delete_task, ids) if task is not None]
+
+    @staticmethod
+    def as_members(value, enum):
+        """ None -> every member, a member -> (member,), an iterable of members -> tuple """
+        if value is None:
+            return tuple(enum)
+        if isinstance(value, enum):
+            return (value,)
+        return tuple(value)
+
+    def query(self, status=None, priority=None, limit: int = None):
+        """
+        status, priority : a member, several members, or None for any
+        returns          : up to `limit` matching tasks, read from the (status, priority) buckets only
+        """
+        buckets = (
+            self.tasks_by_state.get((the_status, the_priority), {})
+            for the_status in self.as_members(status, Status)
+            for the_priority in self.as_members(priority, Priority)
+        )
+        return list(islice(chain.from_iterable(bucket.values() for bucket in buckets), limit))
+
+    def show_tasks(self, start: int = 0, count: int = None, chunk_size: int = 256):
+        """ streams tasks `start` .. `start + count` to stdout, one write per `chunk_size` lines """
+        stop = None if count is None else start + count
+        chunk = []
+        for num, task in islice(self.get_all_tasks(), start, stop):
+            chunk.append(f"Task number {num} : {task}\n")
+            if len(chunk) == chunk_size:
+                sys.stdout.write("".join(chunk))
+                chunk.clear()
+        sys.stdout.write("".join(chunk))
+        sys.stdout.flush()
     
+    def apply_update(self, task: Task, task_description: str, task_priority: Priority, task_status: Status):
+        indexed = task.id in self.tasks
+        if indexed:
+            self.unindex_task(task)
+        if task_description:
+            task.description = task_description
+        if task_priority:
+            task.priority = task_priority
+        if task_status:
+            task.status = task_status
+        task.invalidate()
+        if indexed:
+            self.index_task(task)
+
     def update_task(self, task: Task, task_description: str, task_priority: Priority, task_status: Status):
-        for the_task in self.get_all_tasks():
-            if task_description:
-                if task == the_task[1]:
-                    task.description = task_description
-            if task_priority:
-                if task == the_task[1]:
-                    task.priority = task_priority
-            if task_status:
-                if task == the_task[1]:
-                    task.status = task_status
+        self.apply_update(task, task_description, task_priority, task_status)
         print("Task updated successfuly!\n")
 
+    def update_tasks(self, changes):
+        """
+        changes : {id: {"description": ..., "priority": ..., "status": ...}} or (id, patch) pairs,
+                  priority / status given as enum members or their values
+        returns : [(id, None)] for each applied patch, [(id, error message)] for each rejected one
+        """
+        results = []
+        for id, patch in (changes.items() if isinstance(changes, dict) else changes):
+            task = self.tasks.get(id)
+            if task is None:
+                results.append((id, f"no task with id {id}"))
+                continue
+            try:
+                unknown = set(patch) - {"description", "priority", "status"}
+                if unknown:
+                    raise ValueError(f"unknown fields {sorted(unknown)}")
+                description = patch.get("description")
+                if description is not None and not isinstance(description, str):
+                    raise ValueError(f"'description' must be a string, but {type(description)} is found.")
+                if description is not None and not description.strip():
+                    raise ValueError("Description cannot be empty.")
+                priority = Priority(patch["priority"]) if patch.get("priority") is not None else None
+                status = Status(patch["status"]) if patch.get("status") is not None else None
+            except ValueError as error:
+                results.append((id, str(error)))
+                continue
+            self.apply_update(task, description, priority, status)
+            results.append((id, None))
+        return results
+
 class Interface:
 
     def __init__(self):
@@ -138,9 +260,13 @@ class Interface:
 
 class CMDInterface(Interface):
 
+    ansi_enabled = False
+
     def __init__(self, todo: Todo):
         super().__init__()
         self.todo = todo
+        self.page_size = 20
+        self.enable_ansi()
         self.opening_message = "\n".join([
             "Please choose an option: ",
             "1 : create a task",
@@ -156,8 +282,39 @@ class CMDInterface(Interface):
             "0 : cancel\n"
         ])
     
+    @classmethod
+    def enable_ansi(cls):
+        # `os.system("")` switches the Windows console to VT mode as a side effect,
+        # it stays on until the process exits
+        if os.name == "nt" and not cls.ansi_enabled:
+            os.system("")
+            cls.ansi_enabled = True
+
     def clear_screen(self):
-        os.system("cls")
+        # an escape sequence instead of spawning `cls` / `clear` on every redraw
+        sys.stdout.write("\x1b[H\x1b[2J")
+        sys.stdout.flush()
+
+    def show_pages(self):
+        start = 0
+        while True:
+            total = len(self.todo.tasks)
+            print(f"Tasks {min(start + 1, total)}-{min(start + self.page_size, total)} of {total}")
+            self.todo.show_tasks(start=start, count=self.page_size)
+            command = input("n : next page, p : previous page, s : page size, 0 : back\n").strip().lower()
+            self.clear_screen()
+            if command == "n" and start + self.page_size < total:
+                start += self.page_size
+            elif command == "p":
+                start = max(start - self.page_size, 0)
+            elif command == "s":
+                try:
+                    self.page_size = max(int(input("Tasks per page :\t")), 1)
+                except ValueError:
+                    print("INVALID CHOICE, PLEASE SELECT A VALID NUMBER\n")
+                start -= start % self.page_size
+            elif command == "0":
+                break
 
     def run(self):
         while True:
@@ -188,7 +345,7 @@ class CMDInterface(Interface):
                     if not description:
                         print("Description cannot be empty.\n")
                         continue
-                    if any(description.lower() == task.description.lower() for task in self.todo.tasks):
+                    if self.todo.has_description(description):
                         self.clear_screen()
                         print(f"A task with the description : {description} already exists. Please enter a different one.\n")
                         continue
@@ -208,13 +365,13 @@ class CMDInterface(Interface):
                 self.todo.show_tasks()
                 while True:
                     task_to_update = int(input("Choose the number of the task you want to update/modify\t(Tape 0 to exit)\n"))
-                    if task_to_update in [the_task[0] for the_task in self.todo.get_all_tasks()]:
-                        task_to_update = [the_task[1] for the_task in self.todo.get_all_tasks() if the_task[0] == task_to_update]
+                    if self.todo.get_task_by_number(task_to_update) is not None:
+                        task_to_update = self.todo.get_task_by_number(task_to_update)
                         update_by_id_description = UpdatingMessage(int(input("Choose with which way you want to update the task\n1 : by id\n2 : by description\n")))
                         if UpdatingMessage.BY_ID == update_by_id_description:
-                            task_to_update = self.todo.get_task_by_id(task_to_update)
+                            task_to_update = self.todo.get_task_by_id(task_to_update.id)
                         elif UpdatingMessage.BY_DESCRIPTION == update_by_id_description:
-                            task_to_update = self.todo.get_task_by_description(task_to_update)
+                            task_to_update = self.todo.get_task_by_description(task_to_update.description)
                         else:
                             print("EROOR")
                         task_description = input("Enter the task description\t Tape on 'Space' and 'Enter' if you don't want to update the description of the task\t")
@@ -231,7 +388,7 @@ class CMDInterface(Interface):
                 pass
             elif OpeningMessage.SHOW == msg_code:
                 self.clear_screen()
-                todo.show_tasks()
+                self.show_pages()
                 
 
 
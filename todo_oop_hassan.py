@@ -1,5 +1,7 @@
 from enum import Enum, auto
+from itertools import chain, count, islice
 import os
+import sys
 
 class Status(Enum):
     NOT_STARTED = auto()
@@ -23,70 +25,182 @@ class UpdatingMessage(Enum):
     BY_DESCRIPTION = auto()
     EXIT = 0
 
+class PagingMessage(Enum):
+    NEXT = auto()
+    PREVIOUS = auto()
+    PAGE_SIZE = auto()
+    EXIT = 0
+
 class Task:
-    id_counter = 0
+    __slots__ = ("id", "description", "priority", "status", "rendered")
+
+    id_counter = count(1)
 
     def __init__(self, description: str, priority: Priority, status: Status = Status.NOT_STARTED):
         self.id = self.get_id()
         self.set_description(description)
         self.set_priority(priority)
         self.status = status
+        self.invalidate()
 
     def set_description(self, description: str):
         if not isinstance(description, str):
             raise ValueError(f"'description' must be a string, but {type(description)} is found.")
         self.description = description
+        self.invalidate()
 
     def set_priority(self, priority: Priority):
         if not isinstance(priority, Priority):
             raise ValueError(f"'priority' must be a Priority instance, but {type(priority)} is found.")
         self.priority = priority
+        self.invalidate()
+
+    def invalidate(self):
+        self.rendered = None
 
     def __repr__(self):
-        return f"Task(id={self.id}, description='{self.description}', priority={self.priority.name}, status={self.status.name})"
+        if self.rendered is None:
+            self.rendered = f"Task(id={self.id}, description='{self.description}', priority={self.priority.name}, status={self.status.name})"
+        return self.rendered
 
     @classmethod
     def get_id(cls):
-        cls.id_counter += 1
-        return cls.id_counter
+        return next(cls.id_counter)
 
 class Todo:
 
     def __init__(self):
-        self.tasks = []
+        self.tasks = {}
+        self.tasks_by_description = {}
+        self.tasks_by_state = {}
+
+    @staticmethod
+    def description_key(description: str):
+        return description.casefold()
+
+    @staticmethod
+    def pop_from_bucket(buckets, key, task: Task):
+        bucket = buckets.get(key)
+        if bucket is not None:
+            bucket.pop(task.id, None)
+            if not bucket:
+                del buckets[key]
+
+    def index_task(self, task: Task):
+        self.tasks_by_description.setdefault(self.description_key(task.description), {})[task.id] = task
+        self.tasks_by_state.setdefault((task.status, task.priority), {})[task.id] = task
+
+    def unindex_task(self, task: Task):
+        self.pop_from_bucket(self.tasks_by_description, self.description_key(task.description), task)
+        self.pop_from_bucket(self.tasks_by_state, (task.status, task.priority), task)
 
     def add_task(self, task: Task):
-        self.tasks.append(task)
+        self.tasks[task.id] = task
+        self.index_task(task)
     
     def get_all_tasks(self):
-        return [(i + 1, task) for i, task in enumerate(self.tasks)]
+        return enumerate(self.tasks.values(), start=1)
+
+    def get_task_by_number(self, number: int):
+        if not 1 <= number <= len(self.tasks):
+            return None
+        return next(islice(self.tasks.values(), number - 1, None))
 
     def get_task_by_id(self, id: int):
-        for task in self.tasks:
-            if id == task.id:
-                return task
+        return self.tasks.get(id)
 
     def get_task_by_description(self, description: str):
-        for task in self.tasks:
+        for task in self.tasks_by_description.get(self.description_key(description), {}).values():
             if description == task.description:
                 return task
 
-    def show_tasks(self):
+    def has_description(self, description: str):
+        return self.description_key(description) in self.tasks_by_description
+
+    def delete_task(self, id: int):
+        task = self.tasks.get(id)
+        if task is None:
+            return None
+        self.unindex_task(task)
+        del self.tasks[id]
+        return task
+
+    def delete_tasks(self, ids):
+        return [task for task in map(self.delete_task, ids) if task is not None]
+
+    @staticmethod
+    def as_members(value, enum):
+        if value is None:
+            return tuple(enum)
+        if isinstance(value, enum):
+            return (value,)
+        return tuple(value)
+
+    def query(self, status=None, priority=None, limit=None):
+        buckets = (
+            self.tasks_by_state.get((the_status, the_priority), {})
+            for the_status in self.as_members(status, Status)
+            for the_priority in self.as_members(priority, Priority)
+        )
+        return list(islice(chain.from_iterable(bucket.values() for bucket in buckets), limit))
+
+    def show_tasks(self, start: int = 0, count: int = None, chunk_size: int = 256):
         if not self.tasks:
             print("No tasks available.")
-        else:
-            for num, task in self.get_all_tasks():
-                print(f"Task number {num} :", task)
-
-    def update_task(self, task: Task, task_description: str = "", task_priority=None, task_status=None):
-        if task_description.strip():
+            return
+        stop = None if count is None else start + count
+        chunk = []
+        for num, task in islice(self.get_all_tasks(), start, stop):
+            chunk.append(f"Task number {num} : {task}\n")
+            if len(chunk) == chunk_size:
+                sys.stdout.write("".join(chunk))
+                chunk.clear()
+        sys.stdout.write("".join(chunk))
+        sys.stdout.flush()
+
+    def apply_update(self, task: Task, task_description: str = "", task_priority=None, task_status=None):
+        indexed = task.id in self.tasks
+        if indexed:
+            self.unindex_task(task)
+        if task_description and task_description.strip():
             task.description = task_description
         if task_priority:
             task.priority = task_priority
         if task_status:
             task.status = task_status
+        task.invalidate()
+        if indexed:
+            self.index_task(task)
+
+    def update_task(self, task: Task, task_description: str = "", task_priority=None, task_status=None):
+        self.apply_update(task, task_description, task_priority, task_status)
         print("Task updated successfully!\n")
 
+    def update_tasks(self, changes):
+        results = []
+        for id, patch in (changes.items() if isinstance(changes, dict) else changes):
+            task = self.tasks.get(id)
+            if task is None:
+                results.append((id, f"no task with id {id}"))
+                continue
+            try:
+                unknown = set(patch) - {"description", "priority", "status"}
+                if unknown:
+                    raise ValueError(f"unknown fields {sorted(unknown)}")
+                description = patch.get("description")
+                if description is not None and not isinstance(description, str):
+                    raise ValueError(f"'description' must be a string, but {type(description)} is found.")
+                if description is not None and not description.strip():
+                    raise ValueError("Description cannot be empty.")
+                priority = Priority(patch["priority"]) if patch.get("priority") is not None else None
+                status = Status(patch["status"]) if patch.get("status") is not None else None
+            except ValueError as error:
+                results.append((id, str(error)))
+                continue
+            self.apply_update(task, description, priority, status)
+            results.append((id, None))
+        return results
+
 class Interface:
     def __init__(self):
         pass
@@ -99,9 +213,12 @@ class Interface:
 
 class CMDInterface(Interface):
 
+    vt_mode = False
+
     def __init__(self, todo: Todo):
         super().__init__()
         self.todo = todo
+        self.page_size = 20
         self.clear_screen()
         self.opening_message = "\n".join([
             "Please choose an option:",
@@ -113,7 +230,42 @@ class CMDInterface(Interface):
         ])
     
     def clear_screen(self):
-        os.system("cls" if os.name == "nt" else "clear")
+        # cmd.exe ignores escape codes until an empty os.system turns VT mode on
+        if os.name == "nt" and not CMDInterface.vt_mode:
+            os.system("")
+            CMDInterface.vt_mode = True
+        # cursor home + erase display, no clear subprocess
+        sys.stdout.write("\x1b[H\x1b[2J")
+        sys.stdout.flush()
+
+    def show_pages(self):
+        start = 0
+        while True:
+            self.todo.show_tasks(start=start, count=self.page_size)
+            try:
+                choice = PagingMessage(int(input("Page (1: Next, 2: Previous, 3: Page size, 0: Back): ")))
+            except:
+                self.clear_screen()
+                print("INVALID CHOICE, PLEASE SELECT A VALID NUMBER\n")
+                continue
+            self.clear_screen()
+            if choice == PagingMessage.EXIT:
+                break
+            if choice == PagingMessage.NEXT and start + self.page_size < len(self.todo.tasks):
+                start += self.page_size
+            elif choice == PagingMessage.PREVIOUS:
+                start = max(start - self.page_size, 0)
+            elif choice == PagingMessage.PAGE_SIZE:
+                while True:
+                    try:
+                        self.page_size = int(input("Tasks per page: "))
+                    except:
+                        print("INVALID CHOICE, PLEASE SELECT A VALID NUMBER\n")
+                        continue
+                    if self.page_size > 0:
+                        break
+                    print("Tasks per page must be at least 1.\n")
+                start -= start % self.page_size
 
     def run(self):
         while True:
@@ -145,7 +297,7 @@ class CMDInterface(Interface):
                     if not description:
                         print("Description cannot be empty.\n")
                         continue
-                    if any(task.description.lower() == description.lower() for task in self.todo.tasks):
+                    if self.todo.has_description(description):
                         print("A task with this description already exists. Please enter a different one.\n")
                         continue
                     break
@@ -221,7 +373,7 @@ class CMDInterface(Interface):
 
             elif msg_code == OpeningMessage.SHOW:
                 self.clear_screen()
-                self.todo.show_tasks()
+                self.show_pages()
 
             elif msg_code == OpeningMessage.DELETE:
                 self.todo.show_tasks()
@@ -229,9 +381,9 @@ class CMDInterface(Interface):
                     task_number = int(input("Enter the number of the task you want to delete (0 to cancel): "))
                     if task_number == 0:
                         continue
-                    task_to_delete = dict(self.todo.get_all_tasks()).get(task_number)
+                    task_to_delete = self.todo.get_task_by_number(task_number)
                     if task_to_delete:
-                        self.todo.tasks.remove(task_to_delete)
+                        self.todo.delete_task(task_to_delete.id)
                         print("Task deleted successfully.\n")
                     else:
                         print("Invalid task number.\n")
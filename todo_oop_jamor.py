@@ -1,6 +1,47 @@
+from array import array
+from bisect import bisect_left, insort
+from collections import deque
+from contextlib import contextmanager
 from enum import Enum
+from functools import wraps
+from http import HTTPStatus
+from itertools import accumulate, chain, count, islice
+from urllib.parse import parse_qs, urlsplit
+import argparse
+import asyncio
+import cProfile
+import csv
+import heapq
+import json
+import math
+import mmap
+import multiprocessing
+import re
+import shlex
+import shutil
+import socket
+import sqlite3
+import struct
 import sys
 import os
+import pstats
+import threading
+import time
+import tracemalloc
+import zlib
+
+try:
+    import fcntl
+except ImportError:     # windows: blocks are only coordinated inside the process
+    fcntl = None
+
+try:
+    from PySide6 import QtCore, QtWidgets
+except ImportError:
+    try:
+        from PyQt5 import QtCore, QtWidgets
+    except ImportError:     # no Qt binding: `QTInterface` cannot run
+        QtCore = QtWidgets = None
 
 from typing import Optional
 
@@ -19,100 +60,2317 @@ class MenuOption(Enum):
     CREATE: int = 1
     UPDATE: int = 2
     SHOW: int = 3
+    IMPORT: int = 4
+    EXPORT: int = 5
+    SEARCH: int = 6
+    UNDO: int = 7
+    REDO: int = 8
 
 class OS(Enum):
     LINUX: int = 0
     WINDOWS: int = 1
 
+class SyncMode(Enum):
+    ALWAYS: int = 0     # fsync after every record
+    GROUP: int = 1      # fsync once every `group_size` records
+    INTERVAL: int = 2   # fsync at most once every `interval` seconds
+
+
+class IdAllocator:
+    """ Hands out unique task ids to many threads without a lock on the hot path.
+
+    Each thread takes ids from its own block of `block_size` ids; only
+    reserving a new block takes the lock. With a `path`, the high-water mark
+    (last reserved id) is stored in that file and the reservation is made
+    under a file lock, so ids are never reused after a restart or by another
+    process sharing the file.
+    """
+
+    def __init__(self, block_size: int = 1024, path: Optional[str] = None):
+        self.block_size = block_size
+        self.path = path
+
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+        self.high_water: int = 0
+        # ids up to `floor` are taken by tasks loaded from storage
+        self.floor: int = 0
+
+    def read_high_water(self, file) -> int:
+        file.seek(0)
+        content = file.read().strip()
+        return int(content) if content else 0
+
+    def write_high_water(self, file, high_water: int):
+        file.seek(0)
+        file.truncate()
+        file.write(str(high_water))
+        file.flush()
+        os.fsync(file.fileno())
+
+    def reserve_block(self) -> range:
+        with self.lock:
+            start = max(self.high_water, self.floor)
+
+            if self.path is not None:
+                with open(self.path, "a+", encoding="utf-8") as file:
+                    if fcntl is not None:
+                        fcntl.flock(file, fcntl.LOCK_EX)
+                    start = max(start, self.read_high_water(file))
+                    self.write_high_water(file, start + self.block_size)
+
+            self.high_water = start + self.block_size
+
+            return range(start + 1, self.high_water + 1)
+
+    def next_id(self) -> int:
+        ids = getattr(self.local, "ids", None)
+
+        if ids is not None:
+            id = next(ids, None)
+            if id is not None and id > self.floor:
+                return id
+
+        self.local.ids = iter(self.reserve_block())
+        return next(self.local.ids)
+
+    def observe(self, id: int):
+        """ marks an existing id (e.g. loaded from storage) as used """
+        if id > self.floor:
+            with self.lock:
+                self.floor = max(self.floor, id)
+
+
+class SnowflakeSlot:
+    """ The node slot a thread of a `SnowflakeIdAllocator` owns, with the clock of its sequence """
+
+    __slots__ = ("allocator", "node", "last_ms", "sequence")
+
+    def __init__(self, allocator: 'SnowflakeIdAllocator', node: int, last_ms: int, sequence: int):
+        self.allocator = allocator
+        self.node = node
+        self.last_ms = last_ms
+        self.sequence = sequence
+
+    def __del__(self):
+        # the thread-local storage of an exited thread is dropped: its slot can be reused
+        self.allocator.release_slot(self)
+
+
+class SnowflakeIdAllocator(IdAllocator):
+    """ Time-ordered 63-bit ids: milliseconds since `epoch` | 10-bit node | 12-bit sequence.
+
+    The node combines `worker_id` (one per process) with a per-thread slot, so
+    threads and processes never share a sequence and no lock is needed.
+    A slot is given back when its thread exits; more than `2 ** thread_bits`
+    threads allocating at once raise `RuntimeError`.
+    These ids do not fit in `TaskStore`'s 32-bit id column.
+    """
+
+    epoch: int = 1_704_067_200_000  # 2024-01-01 in ms
+
+    node_bits: int = 10
+    sequence_bits: int = 12
+
+    def __init__(self, worker_id: int = 0, thread_bits: int = 5):
+        super().__init__()
+
+        self.worker_id = worker_id
+        self.thread_bits = thread_bits
+
+        # slots of exited threads as `(node, last_ms, sequence)`, the next owner carries on their sequence
+        self.free_slots: list[tuple[int, int, int]] = []
+        self.next_slot: int = 0
+
+        if worker_id >= 1 << (self.node_bits - thread_bits):
+            raise ValueError(f"'worker_id' must be lower than {1 << (self.node_bits - thread_bits)}.")
+
+    def acquire_slot(self) -> SnowflakeSlot:
+        with self.lock:
+            if self.free_slots:
+                return SnowflakeSlot(self, *self.free_slots.pop())
+
+            if self.next_slot >= 1 << self.thread_bits:
+                raise RuntimeError(
+                    f"all {1 << self.thread_bits} thread slots of worker {self.worker_id} are taken by live threads."
+                )
+
+            node = (self.worker_id << self.thread_bits) | self.next_slot
+            self.next_slot += 1
+
+            return SnowflakeSlot(self, node, 0, 0)
+
+    def release_slot(self, slot: SnowflakeSlot):
+        # no lock: this may run while the lock is held, and `list.append` is atomic
+        self.free_slots.append((slot.node, slot.last_ms, slot.sequence))
+
+    def next_id(self) -> int:
+        slot = getattr(self.local, "slot", None)
+        if slot is None:
+            slot = self.local.slot = self.acquire_slot()
+
+        while True:
+            now = int(time.time() * 1000) - self.epoch
+
+            if now <= slot.last_ms:
+                slot.sequence = (slot.sequence + 1) & ((1 << self.sequence_bits) - 1)
+                if slot.sequence == 0:
+                    # sequence exhausted for this millisecond, borrow the next one
+                    slot.last_ms += 1
+            else:
+                slot.sequence = 0
+                slot.last_ms = now
+
+            floor = self.floor
+            if self.compose(slot) <= floor:
+                # stored ids are ahead of the clock (stepped back): carry on from sequence 0
+                # of the millisecond after the floor's
+                slot.last_ms = (floor >> (self.node_bits + self.sequence_bits)) + 1
+                slot.sequence = 0
+
+            id = self.compose(slot)
+            if id > self.floor:
+                return id
+
+    def compose(self, slot: SnowflakeSlot) -> int:
+        return (slot.last_ms << (self.node_bits + self.sequence_bits)) | (slot.node << self.sequence_bits) | slot.sequence
+
 
 class Task:
 
-    id_counter: int = 0
+    __slots__ = ("id", "description", "priority", "status", "version", "task_db", "rendered")
+
+    # replace with `IdAllocator(path=...)` or `SnowflakeIdAllocator(...)` before creating tasks
+    id_allocator: IdAllocator = IdAllocator()
+
+    # shared by every task, only used by `__repr__`
+    max_len_desc: int = 60
 
     description: str
     priority: Priority
 
-    task_db: 'TaskDB' = None 
-
     def __init__(
         self,
         description: str,
         priority: Priority,
-        status: Status = Status.NOT_STARTED
+        status: Status = Status.NOT_STARTED,
+        id: Optional[int] = None,
+        version: int = 1
     ):
-        self.id: int = self.get_id()
         self.set_description(description=description)
         self.set_priority(priority=priority)
+        self.set_status(status=status)
+        # allocated once the fields are valid: a rejected task (an import row) uses up no id
+        self.id: int = self.get_id() if id is None else self.reserve_id(id)
+
+        # bumped by every update made through a `TaskDB`, see `TaskDB.update_task`
+        self.version = version
+
+        self.task_db: Optional['TaskDB'] = None
+        
+    def set_description(self, description: str):
+        if not isinstance(description, str):
+            raise ValueError(f"'desciption' must be a string, but {type(description)} is found.")
+
+        self.description = description
+        self.invalidate()
+
+    def set_priority(self, priority: Priority):
+        if not isinstance(priority, Priority):
+            raise ValueError(f"'priority' must be a string, but {type(priority)} is found.")
+
+        self.priority = priority
+        self.invalidate()
+
+    def set_status(self, status: Status):
+        if not isinstance(status, Status):
+            raise ValueError(f"'status' must be a Status, but {type(status)} is found.")
+
+        self.status = status
+        self.invalidate()
+
+    def invalidate(self):
+        """ drops the cached `__repr__`, called by every setter """
+        self.rendered: Optional[str] = None
+
+    def render(self) -> str:
+
+        desc = self.description[:min(self.max_len_desc, len(self.description)) + 1]
+
+        return f"Task(id={self.id}, desc=`{desc}{'...' if len(self.description) > self.max_len_desc else ''}`, status={self.status.name}, priority={self.priority.name})"
+
+    def __repr__(self) -> str: 
+        if self.rendered is None:
+            self.rendered = self.render()
+        return self.rendered
+    
+    @classmethod
+    def get_id(cls):
+        return cls.id_allocator.next_id()
+
+    @classmethod
+    def reserve_id(cls, id: int) -> int:
+        """ keep an id coming from storage, so new tasks never reuse it """
+        cls.id_allocator.observe(id)
+        return id
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "description": self.description,
+            "priority": self.priority.name,
+            "status": self.status.name,
+            "version": self.version,
+        }
+
+    @classmethod
+    def from_dict(cls, record: dict) -> 'Task':
+        return cls(
+            description=record["description"],
+            priority=Priority[record["priority"]],
+            status=Status[record["status"]],
+            id=record["id"],
+            version=record.get("version", 1)
+        )
+    
+    def set_task_db(self, task_db: 'TaskDB'):
+        self.task_db = task_db 
+    
+    def save(self) -> 'Self':
+        if (self.task_db is None) and not isinstance(self.task_db, TaskDB):
+            raise AttributeError('`task_db` must be not None, use `set_task_db`')
+         
+        self.task_db.add_task(self)
+
+        return self 
+
+
+class TaskView:
+    """ Lightweight `Task` handed out by `TaskStore`, reads and writes the store columns """
+
+    __slots__ = ("store", "row")
+
+    max_len_desc: int = Task.max_len_desc
+
+    # rows of a `TaskStore` are not versioned
+    version: int = 1
+
+    def __init__(self, store: 'TaskStore', row: int):
+        self.store = store
+        self.row = row
+
+    @property
+    def id(self) -> int:
+        return self.store.ids[self.row]
+
+    @property
+    def description(self) -> str:
+        return self.store.descriptions[self.store.description_refs[self.row]]
+
+    @description.setter
+    def description(self, description: str):
+        self.store.description_refs[self.row] = self.store.intern(description)
+
+    @property
+    def priority(self) -> Priority:
+        return Priority(self.store.priorities[self.row])
+
+    @priority.setter
+    def priority(self, priority: Priority):
+        self.store.priorities[self.row] = priority.value
+
+    @property
+    def status(self) -> Status:
+        return Status(self.store.statuses[self.row])
+
+    @status.setter
+    def status(self, status: Status):
+        self.store.statuses[self.row] = status.value
+
+    set_description = Task.set_description
+    set_priority = Task.set_priority
+    set_status = Task.set_status
+    to_dict = Task.to_dict
+    __repr__ = Task.render
+
+    def invalidate(self):
+        # views read the columns on every call, nothing is cached
+        pass
+
+
+class TaskStore:
+    """ Columnar task storage: parallel arrays for id / status / priority and an interned description table.
+
+    A million tasks cost a few bytes per column instead of one Python object
+    each; `TaskView`s are created on demand when a row is read.
+    """
+
+    def __init__(self):
+        self.ids = array("I")
+        self.statuses = array("B")
+        self.priorities = array("B")
+        self.description_refs = array("I")
+
+        self.descriptions: list[str] = []
+        self.description_table: dict[str, int] = {}
+
+    def intern(self, description: str) -> int:
+        ref = self.description_table.get(description)
+        if ref is None:
+            ref = self.description_table[description] = len(self.descriptions)
+            self.descriptions.append(description)
+        return ref
+
+    def append(
+        self,
+        description: str,
+        priority: Priority,
+        status: Status = Status.NOT_STARTED,
+        id: Optional[int] = None
+    ) -> TaskView:
+
+        if not isinstance(description, str):
+            raise ValueError(f"'desciption' must be a string, but {type(description)} is found.")
+        if not isinstance(priority, Priority):
+            raise ValueError(f"'priority' must be a Priority, but {type(priority)} is found.")
+
+        self.ids.append(Task.get_id() if id is None else Task.reserve_id(id))
+        self.statuses.append(status.value)
+        self.priorities.append(priority.value)
+        self.description_refs.append(self.intern(description))
+
+        return TaskView(store=self, row=len(self.ids) - 1)
+
+    def add_task(self, task: Task) -> TaskView:
+        return self.append(description=task.description, priority=task.priority, status=task.status, id=task.id)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, row: int) -> TaskView:
+        if not 0 <= row < len(self.ids):
+            raise IndexError(f"row {row} is out of range.")
+        return TaskView(store=self, row=row)
+
+    def __iter__(self):
+        return (TaskView(store=self, row=row) for row in range(len(self.ids)))
+
+    def list(self):
+        return iter(self)
+
+
+class Storage:
+    """ Persistence backend of `TaskDB`, the default one keeps nothing """
+
+    def load(self) -> list[dict]:
+        return []
+
+    def write(self, op: str, record: dict):
+        ...
+
+    def write_many(self, entries):
+        """ `entries` are `(op, record)` pairs, possibly a generator that is never consumed here """
+        ...
+
+    def wants_snapshot(self) -> bool:
+        return False
+
+    def snapshot(self, records):
+        ...
+
+    def close(self):
+        ...
+
+
+class LogStorage(Storage):
+    """ Append-only log of `create` / `update` / `delete` records, compacted into a snapshot.
+
+    `<path>.snapshot` holds one task record per line, `<path>.log` holds the
+    records written since that snapshot. On startup the snapshot is loaded and
+    the log replayed on top of it; a torn last line (crash mid-write) is ignored.
+    With `GROUP` and `INTERVAL` a background thread syncs records left behind
+    by the last write, at most `interval` seconds after it.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        sync_mode: SyncMode = SyncMode.ALWAYS,
+        group_size: int = 64,
+        interval: float = 1.0,
+        snapshot_every: int = 10_000
+    ):
+        if not isinstance(sync_mode, SyncMode):
+            raise ValueError(f"'sync_mode' must be a SyncMode option, but {type(sync_mode)} is found.")
+
+        self.log_path = path + ".log"
+        self.snapshot_path = path + ".snapshot"
+
+        self.sync_mode = sync_mode
+        self.group_size = group_size
+        self.interval = interval
+        self.snapshot_every = snapshot_every
+
+        self.log_file = None
+        self.unsynced: int = 0
+        self.last_sync: float = time.monotonic()
+        self.log_records: int = 0
+        self.snapshot_records: int = 0
+
+        # writes may come from several threads and from the flusher
+        self.lock = threading.Lock()
+        self.flusher: Optional[threading.Thread] = None
+        self.stopped = threading.Event()
+
+        # measurements, see `todo_benchmark.py`
+        self.stats = {
+            "startup_seconds": 0.0,
+            "replayed_records": 0,
+            "fsync_count": 0,
+            "fsync_seconds": 0.0,
+        }
+
+    def load(self) -> list[dict]:
+        start = time.perf_counter()
+
+        records: dict[int, dict] = {}
+
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, encoding="utf-8") as file:
+                for line in file:
+                    record = json.loads(line)
+                    records[record["id"]] = record
+                    self.snapshot_records += 1
+
+        if os.path.exists(self.log_path):
+            valid_size = 0
+
+            with open(self.log_path, "rb") as file:
+                for line in file:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        break
+                    if not line.endswith(b"\n"):
+                        break
+
+                    if entry["op"] == "delete":
+                        records.pop(entry["id"], None)
+                    else:
+                        records[entry["task"]["id"]] = entry["task"]
+
+                    valid_size += len(line)
+                    self.log_records += 1
+
+            # drop a torn tail so new records are not appended after it
+            if valid_size != os.path.getsize(self.log_path):
+                os.truncate(self.log_path, valid_size)
+
+        self.stats["replayed_records"] = self.log_records
+        self.stats["startup_seconds"] = time.perf_counter() - start
+
+        return list(records.values())
+
+    def open_log(self):
+        if self.log_file is None:
+            self.log_file = open(self.log_path, "a", encoding="utf-8")
+
+        if self.flusher is None and self.sync_mode is not SyncMode.ALWAYS:
+            self.flusher = threading.Thread(target=self.flush_idle, daemon=True)
+            self.flusher.start()
+
+        return self.log_file
+
+    def flush_idle(self):
+        while not self.stopped.wait(self.interval):
+            with self.lock:
+                self.sync()
+
+    def write(self, op: str, record: dict):
+        self.write_many([(op, record)])
+
+    def write_many(self, entries):
+        with self.lock:
+            log_file = self.open_log()
+
+            for op, record in entries:
+                entry = {"op": op, "id": record["id"]} if op == "delete" else {"op": op, "task": record}
+
+                log_file.write(json.dumps(entry) + "\n")
+                self.log_records += 1
+                self.unsynced += 1
+
+            # a batch is synced as a whole
+            if self.sync_mode is SyncMode.ALWAYS:
+                self.sync()
+            elif self.sync_mode is SyncMode.GROUP and self.unsynced >= self.group_size:
+                self.sync()
+            elif self.sync_mode is SyncMode.INTERVAL and time.monotonic() - self.last_sync >= self.interval:
+                self.sync()
+
+    def sync(self):
+        """ called with `self.lock` held """
+        if self.log_file is None or not self.unsynced:
+            return
+
+        start = time.perf_counter()
+        self.log_file.flush()
+        os.fsync(self.log_file.fileno())
+
+        self.stats["fsync_count"] += 1
+        self.stats["fsync_seconds"] += time.perf_counter() - start
+
+        self.unsynced = 0
+        self.last_sync = time.monotonic()
+
+    def wants_snapshot(self) -> bool:
+        # compacting once the log outgrows the snapshot keeps bulk loads linear
+        return self.log_records >= max(self.snapshot_every, self.snapshot_records)
+
+    @staticmethod
+    def sync_directory(path: str):
+        """ makes a rename in the directory of `path` durable; windows cannot open a directory """
+        if not hasattr(os, "O_DIRECTORY"):
+            return
+
+        directory = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+
+    def snapshot(self, records):
+        tmp_path = self.snapshot_path + ".tmp"
+
+        with self.lock:
+            written = 0
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                for record in records:
+                    file.write(json.dumps(record) + "\n")
+                    written += 1
+                file.flush()
+                os.fsync(file.fileno())
+
+            # the snapshot only replaces the old one once it is fully on disk,
+            # and the log is only emptied once the rename is
+            os.replace(tmp_path, self.snapshot_path)
+            self.sync_directory(self.snapshot_path)
+
+            if self.log_file is not None:
+                self.log_file.close()
+            self.log_file = open(self.log_path, "w", encoding="utf-8")
+
+            self.log_records = 0
+            self.snapshot_records = written
+            self.unsynced = 0
+
+    def close(self):
+        if self.flusher is not None:
+            self.stopped.set()
+            self.flusher.join()
+            self.flusher = None
+            self.stopped.clear()
+
+        with self.lock:
+            if self.log_file is not None:
+                self.sync()
+                self.log_file.close()
+                self.log_file = None
+
+
+class VersionConflictError(Exception):
+    """ Raised by a compare-and-set update when the task is no longer at the expected version """
+
+    def __init__(self, id: int, expected: int, current: Optional[int]):
+        self.id = id
+        self.expected = expected
+        self.current = current
+
+        if current is None:
+            super().__init__(f"task {id} was deleted, expected version {expected}.")
+        else:
+            super().__init__(f"task {id} is at version {current}, not {expected}.")
+
+
+class TaskListener:
+    """ Receives the changes made through a `TaskDB`, see `TaskDB.add_listener` """
+
+    def task_added(self, task: Task):
+        ...
+
+    def task_updated(self, task: Task, before: Optional[dict]):
+        """ `before` is `task.to_dict()` from before the change, None when unknown (task saved twice) """
+        ...
+
+    def task_deleted(self, task: Task):
+        ...
+
+
+class TaskDB:
+
+    def __init__(self, storage: Optional[Storage] = None):
+        # tasks keyed by id, in insertion order
+        self.tasks: dict[int, Task] = {}
+
+        self.listeners: list[TaskListener] = []
+
+        # indexes kept in sync with `self.tasks`
+        self.tasks_by_description: dict[str, dict[int, Task]] = {}
+        self.tasks_by_state: dict[tuple[Status, Priority], dict[int, Task]] = {}
+        # id -> (description key, status, priority) each task is indexed under,
+        # its fields may have changed since (a task saved again)
+        self.index_keys: dict[int, tuple[str, Status, Priority]] = {}
+
+        # held by every write, and while a version is checked and the update it guards is applied
+        self.lock = threading.RLock()
+        # events raised inside a transaction, per thread, see `notify`
+        self.local = threading.local()
+
+        self.storage = storage if storage is not None else Storage()
+        self.load()
+
+    def load(self):
+        for record in self.storage.load():
+            task = Task.from_dict(record)
+            task.set_task_db(task_db=self)
+
+            self.tasks[task.id] = task
+            self.index_task(task)
+
+    def persist(self, op: str, task: Task):
+        self.storage.write(op, task.to_dict())
+        self.snapshot_if_needed()
+
+    def snapshot_if_needed(self):
+        if not self.storage.wants_snapshot():
+            return
+
+        # the snapshot empties the log: no write may land between the copy and the snapshot
+        with self.lock:
+            if self.storage.wants_snapshot():
+                tasks = list(self.tasks.values())
+                self.storage.snapshot(task.to_dict() for task in tasks)
+
+    def close(self):
+        self.storage.close()
+
+    def add_listener(self, listener: TaskListener):
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener: TaskListener):
+        self.listeners.remove(listener)
+
+    def notify(self, event: str, task: Task, *args):
+        if not self.listeners:
+            return
+
+        pending = getattr(self.local, "pending", None)
+        if pending is not None:
+            pending.append((event, task, args))
+            return
+
+        for listener in self.listeners:
+            getattr(listener, event)(task, *args)
+
+    @contextmanager
+    def deferred_notifications(self):
+        """ listeners are called when the outermost block is left, not while its locks are held """
+        if getattr(self.local, "pending", None) is not None:
+            yield
+            return
+
+        self.local.pending = []
+        try:
+            yield
+        finally:
+            pending, self.local.pending = self.local.pending, None
+            for event, task, args in pending:
+                self.notify(event, task, *args)
+
+    @staticmethod
+    def description_key(description: str) -> str:
+        return description.casefold()
+
+    @staticmethod
+    def pop_from_bucket(buckets: dict, key, task: Task):
+        bucket = buckets.get(key)
+        if bucket is not None:
+            bucket.pop(task.id, None)
+            if not bucket:
+                del buckets[key]
+
+    def index_task(self, task: Task):
+        key = self.description_key(task.description)
+        self.tasks_by_description.setdefault(key, {})[task.id] = task
+        self.tasks_by_state.setdefault((task.status, task.priority), {})[task.id] = task
+        self.index_keys[task.id] = (key, task.status, task.priority)
+
+    def unindex_task(self, task: Task):
+        keys = self.index_keys.pop(task.id, None)
+        if keys is None:
+            return
+
+        key, status, priority = keys
+        self.pop_from_bucket(self.tasks_by_description, key, task)
+        self.pop_from_bucket(self.tasks_by_state, (status, priority), task)
+
+    def move_task(self, task: Task, keys: tuple[str, Status, Priority]):
+        """ moves `task` out of the buckets of `keys` only where its fields changed """
+        key, status, priority = keys
+        new_key = self.description_key(task.description)
+        if new_key != key:
+            self.pop_from_bucket(self.tasks_by_description, key, task)
+            self.tasks_by_description.setdefault(new_key, {})[task.id] = task
+
+        if status is not task.status or priority is not task.priority:
+            self.pop_from_bucket(self.tasks_by_state, (status, priority), task)
+            self.tasks_by_state.setdefault((task.status, task.priority), {})[task.id] = task
+
+        self.index_keys[task.id] = (new_key, task.status, task.priority)
+
+    def reindex_task(self, task: Task):
+        """ a task saved again: its fields may have changed without going through `apply_update` """
+        self.unindex_task(task)
+        task.set_task_db(task_db=self)
+        self.tasks[task.id] = task
+        self.index_task(task)
+
+    def add_task(self, task: Task):
+        # every write holds `self.lock`, listeners are called once it is released
+        with self.lock:
+            existed = task.id in self.tasks
+            if existed:
+                # saving a task twice stores its current fields
+                self.reindex_task(task)
+            else:
+                self.tasks[task.id] = task
+                self.index_task(task)
+
+            self.persist("update" if existed else "create", task)
+
+        if existed:
+            self.notify("task_updated", task, None)
+        else:
+            self.notify("task_added", task)
+
+    def add_tasks(self, tasks):
+        """ adds a batch of tasks, written to storage as one batch """
+        written = []
+
+        with self.lock:
+            for task in tasks:
+                if task.id in self.tasks:
+                    self.reindex_task(task)
+                    written.append(("update", task))
+                    continue
+
+                task.set_task_db(task_db=self)
+                self.tasks[task.id] = task
+                self.index_task(task)
+
+                written.append(("create", task))
+
+            # records are only built if the storage keeps them
+            self.storage.write_many((op, task.to_dict()) for op, task in written)
+            self.snapshot_if_needed()
+
+        if self.listeners:
+            for op, task in written:
+                if op == "create":
+                    self.notify("task_added", task)
+                else:
+                    self.notify("task_updated", task, None)
+
+    def get(self, id: int) -> Optional[Task]:
+        return self.tasks.get(id)
+
+    def get_by_description(self, description: str) -> Optional[Task]:
+        for task in self.tasks_by_description.get(self.description_key(description), {}).values():
+            if task.description == description:
+                return task
+        return None
+
+    def has_description(self, description: str) -> bool:
+        return self.description_key(description) in self.tasks_by_description
+
+    @staticmethod
+    def check_update(
+        description: Optional[str] = None,
+        priority: Optional[Priority] = None,
+        status: Optional[Status] = None
+    ):
+        """ raises the setters' errors before any field is set, so an update is applied whole or not at all """
+        if description is not None and not isinstance(description, str):
+            raise ValueError(f"'desciption' must be a string, but {type(description)} is found.")
+        if priority is not None and not isinstance(priority, Priority):
+            raise ValueError(f"'priority' must be a Priority, but {type(priority)} is found.")
+        if status is not None and not isinstance(status, Status):
+            raise ValueError(f"'status' must be a Status, but {type(status)} is found.")
+
+    def apply_update(
+        self,
+        task: Task,
+        description: Optional[str] = None,
+        priority: Optional[Priority] = None,
+        status: Optional[Status] = None
+    ):
+        self.check_update(description=description, priority=priority, status=status)
+
+        keys = self.index_keys.get(task.id)
+
+        before = task.to_dict() if self.listeners else None
+
+        if description is not None:
+            task.set_description(description=description)
+
+        if priority is not None:
+            task.set_priority(priority=priority)
+
+        if status is not None:
+            task.set_status(status=status)
+
+        task.version += 1
+
+        if keys is not None:
+            self.move_task(task, keys)
+            self.notify("task_updated", task, before)
+
+    def save_updates(self, tasks: list[Task]):
+        self.storage.write_many(("update", task.to_dict()) for task in tasks if task.id in self.tasks)
+        self.snapshot_if_needed()
+
+    def update_task(
+        self,
+        task: Task,
+        description: Optional[str] = None,
+        priority: Optional[Priority] = None,
+        status: Optional[Status] = None,
+        expected_version: Optional[int] = None
+    ) -> Task:
+        """ With `expected_version` this is a compare-and-set: the update is applied only if the
+        stored task is still at that version, otherwise `VersionConflictError` is raised.
+
+        Read `task.version` before the fields it guards, the version is bumped
+        after the fields are set. `task` may be an older copy: the change is
+        applied to the stored task, then copied back onto `task`.
+        """
+        with self.transaction():
+            stored = self.get(task.id)
+            current = None if stored is None else stored.version
+            if expected_version is not None and current != expected_version:
+                raise VersionConflictError(task.id, expected_version, current)
+
+            target = task if stored is None else stored
+            self.apply_update(target, description=description, priority=priority, status=status)
+            self.save_updates([target])
+
+        if target is not task:
+            task.description, task.priority, task.status = target.description, target.priority, target.status
+            task.version = target.version
+            task.invalidate()
+
+        return task
+
+    @contextmanager
+    def transaction(self):
+        """ context in which a version check and the writes it guards are atomic;
+        listeners are called once it is left, so they may take locks of their own
+        """
+        with self.deferred_notifications(), self.lock:
+            yield
+
+    def update_tasks(self, changes) -> list[tuple[int, Optional[str]]]:
+        """ Applies many patches in one pass and saves them as one batch.
+
+        `changes` maps ids to patches (or is an iterable of `(id, patch)` pairs),
+        a patch being a dict with any of `description`, `priority`, `status`;
+        priority and status are enum members or their values. A patch holding
+        a `version` is only applied if the task is still at that version. A
+        patch is validated as a whole before being applied. Returns `(id, None)`
+        for each applied patch and `(id, error message)` for each rejected one.
+        """
+        with self.transaction():
+            return self.apply_patches(changes)
+
+    def apply_patches(self, changes) -> list[tuple[int, Optional[str]]]:
+        results, updated = [], []
+
+        for id, patch in (changes.items() if isinstance(changes, dict) else changes):
+            task = self.get(id)
+            if task is None:
+                results.append((id, f"no task with id {id}"))
+                continue
+
+            try:
+                unknown = set(patch) - {"description", "priority", "status", "version"}
+                if unknown:
+                    raise ValueError(f"unknown fields {sorted(unknown)}")
+
+                description = patch.get("description")
+                priority = None if patch.get("priority") is None else Priority(patch["priority"])
+                status = None if patch.get("status") is None else Status(patch["status"])
+                self.check_update(description=description, priority=priority, status=status)
+
+                if patch.get("version") is not None and patch["version"] != task.version:
+                    raise VersionConflictError(id, patch["version"], task.version)
+            except (ValueError, VersionConflictError) as error:
+                results.append((id, str(error)))
+                continue
+
+            self.apply_update(task, description=description, priority=priority, status=status)
+            updated.append(task)
+            results.append((id, None))
+
+        self.save_updates(updated)
+
+        return results
+
+    def delete_task(self, id: int) -> Optional[Task]:
+        with self.lock:
+            task = self.tasks.get(id)
+            if task is None:
+                return None
+
+            self.unindex_task(task)
+            del self.tasks[id]
+
+            self.persist("delete", task)
+
+        self.notify("task_deleted", task)
+
+        return task
+
+    def delete_tasks(self, ids) -> list[Task]:
+        return [task for task in map(self.delete_task, ids) if task is not None]
+
+    @staticmethod
+    def as_members(value, enum: type[Enum]) -> tuple:
+        """ `None` -> every member, a member -> `(member,)`, an iterable of members -> tuple """
+        if value is None:
+            return tuple(enum)
+        if isinstance(value, enum):
+            return (value,)
+        return tuple(value)
+
+    def query(self, status=None, priority=None, limit: Optional[int] = None) -> list[Task]:
+        """ Tasks matching `status` and `priority` (a member, several members, or `None` for any).
+
+        Only the matching (status, priority) buckets are read, so the cost
+        depends on the result size, not on the number of tasks.
+        """
+        buckets = (
+            self.tasks_by_state.get((the_status, the_priority), {})
+            for the_status in self.as_members(status, Status)
+            for the_priority in self.as_members(priority, Priority)
+        )
+
+        return list(islice(chain.from_iterable(bucket.values() for bucket in buckets), limit))
+
+    def count_tasks(self, status=None, priority=None) -> int:
+        """ how many tasks `query` would return, from the bucket sizes """
+        return sum(
+            len(self.tasks_by_state.get((the_status, the_priority), ()))
+            for the_status in self.as_members(status, Status)
+            for the_priority in self.as_members(priority, Priority)
+        )
+
+    def create(
+        self, 
+        description: str,
+        priority: Priority,
+        status: Status = Status.NOT_STARTED
+    ) -> Task:
+        
+        task = Task(description=description, priority=priority, status=status)
+        task.set_task_db(task_db=self)
+
+        return task 
+    
+    def list(self):
+        return self.tasks.values()
+
+    def __len__(self) -> int:
+        return len(self.tasks)
+    
+    def __repr__(self):
+        
+        tasks_list_repr = ",\n".join([
+            "\t" + repr(task) for task in self.list()
+        ])
+
+        return f"{self.__class__.__name__}([\n{tasks_list_repr}\n])"
+
+
+class SQLiteTaskDB(TaskDB):
+    """ `TaskDB` stored in a local SQLite file, with the same `create` / `add_task` / `list` API.
+
+    One connection is kept open for the lifetime of the db (WAL mode), filtered
+    listings are indexed queries, and `add_tasks` inserts a batch in a single
+    transaction. Tasks are built from rows on demand, nothing is cached in memory.
+    """
+
+    schema = (
+        """CREATE TABLE IF NOT EXISTS tasks (
+            id INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            description_key TEXT NOT NULL,
+            priority INTEGER NOT NULL,
+            status INTEGER NOT NULL,
+            version INTEGER NOT NULL DEFAULT 1
+        )""",
+        "CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status)",
+        "CREATE INDEX IF NOT EXISTS tasks_priority ON tasks (priority)",
+        "CREATE INDEX IF NOT EXISTS tasks_description_key ON tasks (description_key)",
+    )
+
+    upsert = (
+        "INSERT INTO tasks (id, description, description_key, priority, status, version) VALUES (?, ?, ?, ?, ?, ?) "
+        "ON CONFLICT (id) DO UPDATE SET description = excluded.description, "
+        "description_key = excluded.description_key, priority = excluded.priority, status = excluded.status, "
+        "version = excluded.version"
+    )
+
+    columns = "id, description, priority, status, version"
+
+    def __init__(self, path: str):
+        self.path = path
+
+        self.listeners: list[TaskListener] = []
+
+        # the connection is shared by the threads of this process
+        self.lock = threading.RLock()
+        self.local = threading.local()
+
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+
+        with self.connection:
+            for statement in self.schema:
+                self.connection.execute(statement)
+
+            # files written before tasks were versioned
+            columns = {row[1] for row in self.connection.execute("PRAGMA table_info(tasks)")}
+            if "version" not in columns:
+                self.connection.execute("ALTER TABLE tasks ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+
+        # new tasks must not reuse an id that is already stored
+        (max_id,) = self.connection.execute("SELECT MAX(id) FROM tasks").fetchone()
+        if max_id is not None:
+            Task.reserve_id(max_id)
+
+    def close(self):
+        self.connection.close()
+
+    def row(self, task: Task) -> tuple:
+        return (
+            task.id, task.description, self.description_key(task.description),
+            task.priority.value, task.status.value, task.version
+        )
+
+    def to_task(self, row: tuple) -> Task:
+        id, description, priority, status, version = row
+
+        task = Task(description=description, priority=Priority(priority), status=Status(status), id=id, version=version)
+        task.set_task_db(task_db=self)
+
+        return task
+
+    def exists(self, id: int) -> bool:
+        return self.connection.execute("SELECT 1 FROM tasks WHERE id = ?", (id,)).fetchone() is not None
+
+    def add_task(self, task: Task):
+        self.add_tasks([task])
+
+    def add_tasks(self, tasks):
+        # every write holds `self.lock`: `with self.connection` would commit a transaction another thread opened
+        with self.lock:
+            if self.listeners:
+                tasks = [(task, self.exists(task.id)) for task in tasks]
+            else:
+                tasks = [(task, False) for task in tasks]
+
+            with self.connection:
+                self.connection.executemany(self.upsert, (self.row(task) for task, _ in tasks))
+
+        if self.listeners:
+            for task, existed in tasks:
+                if existed:
+                    self.notify("task_updated", task, None)
+                else:
+                    self.notify("task_added", task)
+
+    def get(self, id: int) -> Optional[Task]:
+        row = self.connection.execute(f"SELECT {self.columns} FROM tasks WHERE id = ?", (id,)).fetchone()
+        return None if row is None else self.to_task(row)
+
+    def get_by_description(self, description: str) -> Optional[Task]:
+        row = self.connection.execute(
+            f"SELECT {self.columns} FROM tasks WHERE description_key = ? AND description = ? ORDER BY id LIMIT 1",
+            (self.description_key(description), description)
+        ).fetchone()
+        return None if row is None else self.to_task(row)
+
+    def has_description(self, description: str) -> bool:
+        row = self.connection.execute(
+            "SELECT 1 FROM tasks WHERE description_key = ? LIMIT 1", (self.description_key(description),)
+        ).fetchone()
+        return row is not None
+
+    def apply_update(
+        self,
+        task: Task,
+        description: Optional[str] = None,
+        priority: Optional[Priority] = None,
+        status: Optional[Status] = None
+    ):
+        self.check_update(description=description, priority=priority, status=status)
+
+        before = task.to_dict() if self.listeners else None
+
+        if description is not None:
+            task.set_description(description=description)
+
+        if priority is not None:
+            task.set_priority(priority=priority)
+
+        if status is not None:
+            task.set_status(status=status)
+
+        task.version += 1
+
+        self.notify("task_updated", task, before)
+
+    def save_updates(self, tasks: list[Task]):
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "UPDATE tasks SET description = ?, description_key = ?, priority = ?, status = ?, version = ? WHERE id = ?",
+                (self.row(task)[1:] + (task.id,) for task in tasks)
+            )
+
+    @contextmanager
+    def transaction(self):
+        """ holds the SQLite write lock, so versions are also checked against other processes """
+        with self.deferred_notifications(), self.lock, self.connection:
+            if not self.connection.in_transaction:
+                self.connection.execute("BEGIN IMMEDIATE")
+            yield
+
+    def delete_task(self, id: int) -> Optional[Task]:
+        with self.lock:
+            task = self.get(id)
+            if task is None:
+                return None
+
+            with self.connection:
+                self.connection.execute("DELETE FROM tasks WHERE id = ?", (id,))
+
+        self.notify("task_deleted", task)
+
+        return task
+
+    def delete_tasks(self, ids) -> list[Task]:
+        with self.lock:
+            tasks = [task for task in map(self.get, ids) if task is not None]
+
+            with self.connection:
+                self.connection.executemany("DELETE FROM tasks WHERE id = ?", ((task.id,) for task in tasks))
+
+        for task in tasks:
+            self.notify("task_deleted", task)
+
+        return tasks
+
+    def list(
+        self,
+        status: Optional[Status] = None,
+        priority: Optional[Priority] = None,
+        limit: Optional[int] = None
+    ):
+        where, params = self.where(status, priority)
+
+        query = f"SELECT {self.columns} FROM tasks{where} ORDER BY id"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        return map(self.to_task, self.connection.execute(query, params))
+
+    def where(self, status=None, priority=None) -> tuple[str, list]:
+        conditions, params = [], []
+
+        for column, value, enum in (("status", status, Status), ("priority", priority, Priority)):
+            if value is not None:
+                members = self.as_members(value, enum)
+                conditions.append(f"{column} IN ({', '.join('?' * len(members))})")
+                params.extend(member.value for member in members)
+
+        return (" WHERE " + " AND ".join(conditions) if conditions else ""), params
+
+    def query(self, status=None, priority=None, limit: Optional[int] = None) -> 'list[Task]':
+        return list(self.list(status=status, priority=priority, limit=limit))
+
+    def count_tasks(self, status=None, priority=None) -> int:
+        where, params = self.where(status, priority)
+        return self.connection.execute(f"SELECT COUNT(*) FROM tasks{where}", params).fetchone()[0]
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+
+
+
+class MappedTaskDB(TaskDB):
+    """ Read-only `TaskDB` over a binary task file opened with `mmap`.
+
+    Layout (little endian), written by `MappedTaskDB.write`:
+
+        header   magic b"TODO", version, task count, CRC-32 of everything after the header
+        records  one fixed-width record per task: id (u64), status (u8), priority (u8), sorted by id
+        offsets  count + 1 u64 offsets into the string heap
+        heap     UTF-8 descriptions, back to back
+
+    Opening only reads the header; `Task` objects are built when a row is
+    read, so listing a page only touches the pages holding those rows, and
+    `get` is a binary search over the records. The checksum covers the whole
+    file, so it is only checked by `verify()` (or `open(..., verify=True)`).
+    """
+
+    magic: bytes = b"TODO"
+    version: int = 1
+
+    header = struct.Struct("<4sHHQI12x")     # 32 bytes
+    record = struct.Struct("<QBB6x")         # 16 bytes
+    offset = struct.Struct("<Q")
+
+    def __init__(self, path: str, verify: bool = False):
+        self.path = path
+        self.listeners: list[TaskListener] = []
+
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, _, self.count, self.checksum = self.header.unpack_from(self.map, 0)
+        if magic != self.magic:
+            raise ValueError(f"'{path}' is not a task file.")
+        if version != self.version:
+            raise ValueError(f"'{path}' has version {version}, only version {self.version} is supported.")
+
+        self.records_start = self.header.size
+        self.offsets_start = self.records_start + self.count * self.record.size
+        self.heap_start = self.offsets_start + (self.count + 1) * self.offset.size
+
+        if verify and not self.verify():
+            raise ValueError(f"'{path}' is corrupted: checksum mismatch.")
+
+    @classmethod
+    def write(cls, path: str, tasks) -> int:
+        """ writes `tasks` (any iterable of tasks) as a binary task file, returns the task count """
+        rows = sorted(((task.id, task.status.value, task.priority.value, task.description.encode("utf-8")) for task in tasks))
+
+        records = bytearray(cls.record.size * len(rows))
+        offsets = bytearray(cls.offset.size * (len(rows) + 1))
+        heap = bytearray()
+
+        for row, (id, status, priority, description) in enumerate(rows):
+            cls.record.pack_into(records, row * cls.record.size, id, status, priority)
+            cls.offset.pack_into(offsets, row * cls.offset.size, len(heap))
+            heap += description
+        cls.offset.pack_into(offsets, len(rows) * cls.offset.size, len(heap))
+
+        checksum = zlib.crc32(heap, zlib.crc32(offsets, zlib.crc32(records)))
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as file:
+            file.write(cls.header.pack(cls.magic, cls.version, 0, len(rows), checksum))
+            file.write(records)
+            file.write(offsets)
+            file.write(heap)
+        os.replace(tmp_path, path)
+
+        return len(rows)
+
+    def verify(self) -> bool:
+        return zlib.crc32(memoryview(self.map)[self.header.size:]) == self.checksum
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def row_id(self, row: int) -> int:
+        return self.record.unpack_from(self.map, self.records_start + row * self.record.size)[0]
+
+    def description_bytes(self, row: int) -> memoryview:
+        """ zero-copy view of the UTF-8 description of `row` """
+        start, end = struct.unpack_from("<QQ", self.map, self.offsets_start + row * self.offset.size)
+        return memoryview(self.map)[self.heap_start + start:self.heap_start + end]
+
+    def task(self, row: int) -> Task:
+        id, status, priority = self.record.unpack_from(self.map, self.records_start + row * self.record.size)
+
+        task = Task(
+            description=str(self.description_bytes(row), "utf-8"),
+            priority=Priority(priority),
+            status=Status(status),
+            id=id
+        )
+        task.set_task_db(task_db=self)
+
+        return task
+
+    def find_row(self, id: int) -> Optional[int]:
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self.row_id(middle) < id:
+                low = middle + 1
+            else:
+                high = middle
+        return low if low < self.count and self.row_id(low) == id else None
+
+    def get(self, id: int) -> Optional[Task]:
+        row = self.find_row(id)
+        return None if row is None else self.task(row)
+
+    def page(self, offset: int = 0, limit: int = 50) -> list[Task]:
+        return [self.task(row) for row in range(max(offset, 0), min(offset + limit, self.count))]
+
+    def list(self):
+        return (self.task(row) for row in range(self.count))
+
+    def query(self, status=None, priority=None, limit: Optional[int] = None) -> 'list[Task]':
+        """ scans the fixed-width records only, descriptions are read for matching rows """
+        statuses = {member.value for member in self.as_members(status, Status)}
+        priorities = {member.value for member in self.as_members(priority, Priority)}
+
+        records = self.record.iter_unpack(memoryview(self.map)[self.records_start:self.offsets_start])
+        rows = (
+            row for row, (_, the_status, the_priority) in enumerate(records)
+            if the_status in statuses and the_priority in priorities
+        )
+
+        return [self.task(row) for row in islice(rows, limit)]
+
+    def count_tasks(self, status=None, priority=None) -> int:
+        statuses = {member.value for member in self.as_members(status, Status)}
+        priorities = {member.value for member in self.as_members(priority, Priority)}
+
+        records = self.record.iter_unpack(memoryview(self.map)[self.records_start:self.offsets_start])
+        return sum(1 for _, the_status, the_priority in records if the_status in statuses and the_priority in priorities)
+
+    def read_only(self, *args, **kwargs):
+        raise ValueError(f"'{self.path}' is opened read-only, write a new file with 'MappedTaskDB.write'.")
+
+    add_task = add_tasks = update_task = update_tasks = delete_task = delete_tasks = read_only
+
+    def get_by_description(self, description: str) -> Optional[Task]:
+        encoded = description.encode("utf-8")
+        for row in range(self.count):
+            if self.description_bytes(row) == encoded:
+                return self.task(row)
+        return None
+
+    def has_description(self, description: str) -> bool:
+        key = self.description_key(description)
+        return any(str(self.description_bytes(row), "utf-8").casefold() == key for row in range(self.count))
+
+
+class TaskCursor:
+    """ Pages through `task_db.list()`, holding one page of tasks at a time.
+
+    Paging forward resumes the live iterator, so it costs one page whatever the
+    offset; paging back (or a board changed under the iterator) seeks again from
+    the start.
+    """
+
+    def __init__(self, task_db: TaskDB, page_size: int = 20):
+        self.task_db = task_db
+        self.page_size = page_size
+        self.offset = 0
+
+        # live iterator over `task_db.list()` and how many tasks it has yielded
+        self.tasks = None
+        self.position = 0
+
+    def seek(self, offset: int):
+        if self.tasks is None or offset < self.position:
+            self.tasks = iter(self.task_db.list())
+            self.position = 0
+
+        # consume the gap without keeping it
+        skip = offset - self.position
+        next(islice(self.tasks, skip, skip), None)
+        self.position = offset
+
+    def read(self) -> 'list[Task]':
+        self.seek(self.offset)
+        tasks = list(islice(self.tasks, self.page_size))
+        self.position += len(tasks)
+        return tasks
+
+    def page(self) -> 'list[Task]':
+        try:
+            return self.read()
+        except RuntimeError:
+            # tasks were added or deleted since the iterator was made
+            self.tasks = None
+            return self.read()
+
+    def next(self):
+        self.offset += self.page_size
+
+    def prev(self):
+        self.offset = max(self.offset - self.page_size, 0)
+
+    def resize(self, page_size: int):
+        # keep the first task of the current page on screen
+        self.page_size = max(page_size, 1)
+        self.offset -= self.offset % self.page_size
+
+
+class TaskRows(TaskListener):
+    """ Row index of a `TaskDB` for virtualized table views.
+
+    Only task ids are kept, in an `array` (8 bytes a row), fetched from
+    `task_db.list()` `fetch_size` at a time as the view scrolls down. A row
+    is read from the board when it is drawn, and the last `cache_size` drawn
+    rows are kept. Changes made through the `TaskDB` become row inserts,
+    changes and removals, reported to `view` (see `TaskTableModel`); they must
+    come from the thread the view lives in.
+    """
+
+    columns = ("Id", "Description", "Priority", "Status")
+
+    def __init__(self, task_db: TaskDB, view=None, fetch_size: int = 10_000, cache_size: int = 1024):
+        self.task_db = task_db
+        self.view = view
+        self.cache_size = cache_size
+
+        self.ids = array("q")
+        self.cursor = TaskCursor(task_db, page_size=fetch_size)
+        # tasks of the board not fetched yet
+        self.unfetched: int = len(task_db)
+
+        self.cache: dict[int, tuple] = {}
+
+        task_db.add_listener(self)
+
+    def close(self):
+        self.task_db.remove_listener(self)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def notify(self, event: str, *args):
+        if self.view is not None:
+            getattr(self.view, event)(*args)
+
+    def can_fetch(self) -> bool:
+        return self.unfetched > 0
+
+    def fetch(self) -> int:
+        """ appends the next `fetch_size` rows, returns how many """
+        # fetched rows are the head of `task_db.list()`
+        self.cursor.offset = len(self.ids)
+        tasks = self.cursor.page()
+        if not tasks:
+            self.unfetched = 0
+            return 0
+
+        first = len(self.ids)
+        self.notify("rows_inserting", first, first + len(tasks) - 1)
+        self.ids.extend(task.id for task in tasks)
+        self.unfetched = max(self.unfetched - len(tasks), 0)
+        self.notify("rows_inserted")
+
+        return len(tasks)
+
+    def row(self, id: int) -> Optional[int]:
+        # ids are ascending unless tasks were imported with their own ids
+        row = bisect_left(self.ids, id)
+        if row < len(self.ids) and self.ids[row] == id:
+            return row
+
+        try:
+            return self.ids.index(id)
+        except ValueError:
+            return None
+
+    def values(self, row: int) -> tuple:
+        """ the cells of `row`, as strings """
+        id = self.ids[row]
+
+        values = self.cache.get(id)
+        if values is None:
+            task = self.task_db.get(id)
+            if task is None:
+                return ("",) * len(self.columns)
+            values = (str(task.id), task.description, task.priority.name, task.status.name)
+
+            if len(self.cache) >= self.cache_size:
+                del self.cache[next(iter(self.cache))]
+            self.cache[id] = values
+
+        return values
+
+    def task_added(self, task: Task):
+        # a task is appended to the board, so it only becomes a row once the rows before it are fetched
+        if self.unfetched:
+            self.unfetched += 1
+            return
+
+        row = len(self.ids)
+        self.notify("rows_inserting", row, row)
+        self.ids.append(task.id)
+        self.notify("rows_inserted")
+
+    def task_updated(self, task: Task, before: Optional[dict]):
+        self.cache.pop(task.id, None)
+
+        row = self.row(task.id)
+        if row is not None:
+            self.notify("row_changed", row)
+
+    def task_deleted(self, task: Task):
+        self.cache.pop(task.id, None)
+
+        row = self.row(task.id)
+        if row is None:
+            self.unfetched = max(self.unfetched - 1, 0)
+            return
+
+        self.notify("rows_removing", row, row)
+        del self.ids[row]
+        self.notify("rows_removed")
+
+
+class TaskScheduler(TaskListener):
+    """ Answers "what should I work on next": a heap of the `NOT_STARTED` tasks of a `TaskDB`.
+
+    Tasks come out HIGH priority first, then oldest (lowest id) first. Push,
+    pop and reprioritise cost O(log n). Changes made through the `TaskDB`
+    never search the heap: a task whose priority changed is pushed again and
+    its old entry is skipped when it reaches the top, and entries of tasks
+    that are no longer `NOT_STARTED` are skipped the same way.
+    `claim` is safe to call from several worker threads.
+    """
+
+    def __init__(self, task_db: TaskDB):
+        self.task_db = task_db
+
+        # (-priority, id, push order, task): the push order keeps equal entries from comparing tasks
+        self.heap: list[tuple[int, int, int, Task]] = []
+        self.pushes = count()
+        # id -> priority value of the live heap entry of each queued task
+        self.queued: dict[int, int] = {}
+
+        self.lock = threading.RLock()
+
+        for task in task_db.query(status=Status.NOT_STARTED):
+            self.push(task)
+
+        task_db.add_listener(self)
+
+    def __len__(self) -> int:
+        return len(self.queued)
+
+    def push(self, task: Task):
+        with self.lock:
+            self.queued[task.id] = task.priority.value
+            heapq.heappush(self.heap, (-task.priority.value, task.id, next(self.pushes), task))
+
+            # too many skipped entries: rebuild from the live ones
+            if len(self.heap) > 2 * len(self.queued) + 64:
+                self.heap = [entry for entry in self.heap if self.is_live(entry)]
+                heapq.heapify(self.heap)
+
+    def is_live(self, entry: tuple[int, int, int, Task]) -> bool:
+        priority, id, _, _ = entry
+        return self.queued.get(id) == -priority
+
+    def peek(self) -> Optional[Task]:
+        with self.lock:
+            while self.heap and not self.is_live(self.heap[0]):
+                heapq.heappop(self.heap)
+            return self.heap[0][3] if self.heap else None
+
+    def pop_next(self) -> Optional[Task]:
+        """ removes the next task from the queue, without changing its status """
+        with self.lock:
+            task = self.peek()
+            if task is not None:
+                heapq.heappop(self.heap)
+                del self.queued[task.id]
+            return task
+
+    def claim(self) -> Optional[Task]:
+        """ pops the next task and moves it to `IN_PROGRESS`, atomically for concurrent workers """
+        while True:
+            task = self.pop_next()
+            if task is None:
+                return None
+
+            # a compare-and-set outside `self.lock`: the listeners take it too
+            version = task.version
+            if task.status is not Status.NOT_STARTED:
+                continue
+            try:
+                return self.task_db.update_task(task, status=Status.IN_PROGRESS, expected_version=version)
+            except VersionConflictError:
+                # changed since it was queued (the heap may hold an older copy)
+                stored = self.task_db.get(task.id)
+                if stored is not None and stored.status is Status.NOT_STARTED:
+                    self.push(stored)
+
+    def reprioritise(self, task: Task, priority: Priority) -> Task:
+        return self.task_db.update_task(task, priority=priority)
+
+    def task_added(self, task: Task):
+        if task.status is Status.NOT_STARTED:
+            self.push(task)
+
+    def task_updated(self, task: Task, before: Optional[dict]):
+        with self.lock:
+            if task.status is not Status.NOT_STARTED:
+                self.queued.pop(task.id, None)
+            elif self.queued.get(task.id) != task.priority.value:
+                self.push(task)
+
+    def task_deleted(self, task: Task):
+        with self.lock:
+            self.queued.pop(task.id, None)
+
+
+class SearchIndex(TaskListener):
+    """ Inverted index over the casefolded words of task descriptions, kept up to date as a `TaskListener`.
+
+    `search("fix log")` returns tasks ranked by how many rare query words
+    they contain (sum of idf weights); with `prefix=True` each query word also
+    matches the words it starts, which are found by bisecting a sorted vocabulary.
+    """
+
+    token_pattern = re.compile(r"\w+")
+
+    def __init__(self, task_db: TaskDB):
+        self.task_db = task_db
+
+        # word -> {task id: occurrences}
+        self.postings: dict[str, dict[int, int]] = {}
+        self.vocabulary: list[str] = []
+        # description each task was indexed with, to unindex it later
+        self.descriptions: dict[int, str] = {}
+
+        for task in task_db.list():
+            self.add(task)
+
+        task_db.add_listener(self)
+
+    @classmethod
+    def tokenize(cls, text: str) -> list[str]:
+        return cls.token_pattern.findall(text.casefold())
+
+    def add(self, task: Task):
+        self.descriptions[task.id] = task.description
+
+        for token in self.tokenize(task.description):
+            postings = self.postings.get(token)
+            if postings is None:
+                postings = self.postings[token] = {}
+                insort(self.vocabulary, token)
+            postings[task.id] = postings.get(task.id, 0) + 1
+
+    def remove(self, id: int):
+        description = self.descriptions.pop(id, None)
+        if description is None:
+            return
+
+        for token in set(self.tokenize(description)):
+            postings = self.postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(id, None)
+            if not postings:
+                del self.postings[token]
+                del self.vocabulary[bisect_left(self.vocabulary, token)]
+
+    def expand(self, term: str, prefix: bool) -> list[str]:
+        if not prefix:
+            return [term] if term in self.postings else []
+
+        tokens = []
+        for i in range(bisect_left(self.vocabulary, term), len(self.vocabulary)):
+            if not self.vocabulary[i].startswith(term):
+                break
+            tokens.append(self.vocabulary[i])
+        return tokens
+
+    def search(self, query: str, limit: int = 20, prefix: bool = True) -> list[Task]:
+        documents = len(self.descriptions) or 1
+        scores: dict[int, float] = {}
+
+        for term in set(self.tokenize(query)):
+            for token in self.expand(term, prefix=prefix):
+                postings = self.postings[token]
+                idf = math.log(1 + documents / len(postings))
+                for id, occurrences in postings.items():
+                    scores[id] = scores.get(id, 0.0) + idf * (1 + math.log(occurrences))
+
+        best = heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], item[0]))
+
+        return [task for task in (self.task_db.get(id) for id, _ in best) if task is not None]
+
+    def task_added(self, task: Task):
+        self.add(task)
+
+    def task_updated(self, task: Task, before: Optional[dict]):
+        if self.descriptions.get(task.id) != task.description:
+            self.remove(task.id)
+            self.add(task)
+
+    def task_deleted(self, task: Task):
+        self.remove(task.id)
+
+
+class DuplicateDetector(TaskListener):
+    """ Finds near-duplicate descriptions with MinHash LSH over character trigrams, kept up to date as a `TaskListener`.
+
+    Similarity is the Jaccard index of the trigram sets of two casefolded
+    descriptions. Each description gets a `bands * rows` MinHash signature
+    (one hash per trigram, split into bins), and tasks sharing a whole band of
+    it become candidates, which are then verified exactly. A check only reads
+    `bands` buckets instead of every description; the price is recall: with the
+    defaults a pair 70% similar is found 96% of the time, 80% similar 99.7%.
+    """
+
+    def __init__(self, task_db: TaskDB, threshold: float = 0.7, bands: int = 8, rows: int = 3):
+        if not 0 < threshold <= 1:
+            raise ValueError(f"'threshold' must be in ]0, 1], but {threshold} is found.")
+
+        self.task_db = task_db
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = rows
+
+        # (band number, band values) -> ids of the tasks having them
+        self.buckets: dict[tuple, set[int]] = {}
+        self.descriptions: dict[int, str] = {}
+
+        for task in task_db.list():
+            self.add(task)
+
+        task_db.add_listener(self)
+
+    @staticmethod
+    def trigrams(description: str) -> set[str]:
+        text = f"  {' '.join(description.casefold().split())} "
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+
+    def band_keys(self, grams: set[str]) -> list[tuple]:
+        bins = self.bands * self.rows
+        signature = [None] * bins
+
+        for gram in grams:
+            value = hash(gram) & 0xFFFFFFFFFFFFFFFF
+            bin, value = value % bins, value // bins
+            if signature[bin] is None or value < signature[bin]:
+                signature[bin] = value
+
+        # short descriptions leave bins empty: fill each from the next non-empty bin
+        # (rotation densification), otherwise all empty bins would collide
+        if None in signature and grams:
+            filled = list(signature)
+            for bin in range(bins):
+                distance = 1
+                while filled[bin] is None:
+                    source = signature[(bin + distance) % bins]
+                    if source is not None:
+                        filled[bin] = (source, distance)
+                    distance += 1
+            signature = filled
+
+        return [(band, *signature[band * self.rows:(band + 1) * self.rows]) for band in range(self.bands)]
+
+    def add(self, task: Task):
+        self.descriptions[task.id] = task.description
+
+        for key in self.band_keys(self.trigrams(task.description)):
+            self.buckets.setdefault(key, set()).add(task.id)
+
+    def remove(self, id: int):
+        description = self.descriptions.pop(id, None)
+        if description is None:
+            return
+
+        for key in self.band_keys(self.trigrams(description)):
+            ids = self.buckets.get(key)
+            if ids is not None:
+                ids.discard(id)
+                if not ids:
+                    del self.buckets[key]
+
+    def similar(self, description: str, threshold: Optional[float] = None) -> list[tuple[Task, float]]:
+        """ tasks whose description is at least `threshold` similar to `description`, most similar first """
+        threshold = self.threshold if threshold is None else threshold
+        grams = self.trigrams(description)
+
+        candidates = set()
+        for key in self.band_keys(grams):
+            candidates.update(self.buckets.get(key, ()))
+
+        matches = []
+        for id in candidates:
+            other = self.trigrams(self.descriptions[id])
+            similarity = len(grams & other) / len(grams | other)
+            if similarity >= threshold:
+                matches.append((id, similarity))
+
+        matches.sort(key=lambda match: (-match[1], match[0]))
+
+        return [(task, similarity) for task, similarity in ((self.task_db.get(id), similarity) for id, similarity in matches) if task is not None]
+
+    def task_added(self, task: Task):
+        self.add(task)
+
+    def task_updated(self, task: Task, before: Optional[dict]):
+        if self.descriptions.get(task.id) != task.description:
+            self.remove(task.id)
+            self.add(task)
+
+    def task_deleted(self, task: Task):
+        self.remove(task.id)
+
+
+class TaskJournal(TaskListener):
+    """ Bounded undo / redo stacks of the changes made through a `TaskDB`.
+
+    Changes are kept as deltas `(op, id, changes)` holding plain values only:
+
+        ("create", id, record)                       record: `task.to_dict()` after the create
+        ("delete", id, record)                       record: `task.to_dict()` before the delete
+        ("update", id, {field: (before, after)})     changed fields only
+
+    Undoing or redoing a delta touches one task, whatever the size of the
+    board. `apply` replays deltas on any `TaskDB`, so they can also be shipped
+    to a replica. Updates with an unknown `before` (a task saved twice) are
+    not recorded.
+    """
+
+    def __init__(self, task_db: TaskDB, limit: int = 1000):
+        self.task_db = task_db
+
+        self.undo_stack: deque = deque(maxlen=limit)
+        self.redo_stack: deque = deque(maxlen=limit)
+
+        # set while undoing / redoing, so the replayed change is not recorded again
+        self.replaying: bool = False
+
+        task_db.add_listener(self)
+
+    def record(self, delta: tuple):
+        if not self.replaying:
+            self.undo_stack.append(delta)
+            self.redo_stack.clear()
+
+    def task_added(self, task: Task):
+        self.record(("create", task.id, task.to_dict()))
+
+    def task_updated(self, task: Task, before: Optional[dict]):
+        if before is None:
+            return
+
+        after = task.to_dict()
+        changes = {
+            field: (value, after[field]) for field, value in before.items()
+            if field != "version" and after[field] != value
+        }
+        if changes:
+            self.record(("update", task.id, changes))
+
+    def task_deleted(self, task: Task):
+        self.record(("delete", task.id, task.to_dict()))
+
+    @staticmethod
+    def apply(task_db: TaskDB, delta: tuple, undo: bool = False) -> Optional[Task]:
+        """ applies `delta` to `task_db`, or reverts it with `undo=True` """
+        op, id, changes = delta
+
+        if op == "update":
+            task = task_db.get(id)
+            if task is None:
+                raise KeyError(f"no task with id {id}")
+
+            fields = {field: values[0 if undo else 1] for field, values in changes.items()}
+            return task_db.update_task(
+                task,
+                description=fields.get("description"),
+                priority=Priority[fields["priority"]] if "priority" in fields else None,
+                status=Status[fields["status"]] if "status" in fields else None
+            )
+
+        # undoing a create or redoing a delete removes the task, the other two bring it back
+        if (op == "create") == undo:
+            return task_db.delete_task(id)
+
+        task = Task.from_dict(changes)
+        task.set_task_db(task_db=task_db)
+        task_db.add_task(task)
+
+        return task
+
+    def replay(self, source: deque, target: deque, undo: bool) -> Optional[tuple]:
+        if not source:
+            return None
+
+        delta = source.pop()
+        self.replaying = True
+        try:
+            self.apply(self.task_db, delta, undo=undo)
+        finally:
+            self.replaying = False
+        target.append(delta)
+
+        return delta
+
+    def undo(self) -> Optional[tuple]:
+        """ reverts the last change, returns its delta or None when there is nothing to undo """
+        return self.replay(self.undo_stack, self.redo_stack, undo=True)
+
+    def redo(self) -> Optional[tuple]:
+        """ applies again the last undone change, returns its delta or None """
+        return self.replay(self.redo_stack, self.undo_stack, undo=False)
+
+
+class TaskEvent:
+    """ One change of a `ChangeFeed`: `op` is "create", "update" or "delete", `record` is the task
+    as `to_dict()` after the change (before it for a delete) """
 
-        self.status = status
+    __slots__ = ("seq", "op", "id", "record")
 
-        self.max_len_desc: int = 60
-        
-    def set_description(self, description: str):
-        if not isinstance(description, str):
-            raise ValueError(f"'desciption' must be a string, but {type(description)} is found.")
+    def __init__(self, seq: int, op: str, id: int, record: dict):
+        self.seq = seq
+        self.op = op
+        self.id = id
+        self.record = record
 
-        self.description = description
+    def to_dict(self) -> dict:
+        return {"seq": self.seq, "op": self.op, "id": self.id, "task": self.record}
 
-    def set_priority(self, priority: Priority):
-        if not isinstance(priority, Priority):
-            raise ValueError(f"'priority' must be a string, but {type(priority)} is found.")
+    def __repr__(self) -> str:
+        return f"TaskEvent(seq={self.seq}, op={self.op}, id={self.id})"
 
-        self.priority = priority
 
-    def __repr__(self) -> str: 
+class ChangeFeed(TaskListener):
+    """ Numbered stream of the changes made through a `TaskDB`, for UIs and replicas applying diffs.
 
-        desc = self.description[:min(self.max_len_desc, len(self.description)) + 1]
+    Events get consecutive sequence numbers starting at 1 and the last
+    `capacity` of them are kept. A reader remembers the last `seq` it saw and
+    resumes with `since(seq)`, or awaits new events with
+    `async for event in feed.subscribe(after=seq)`. A reader that fell behind
+    the kept events gets a `LookupError` and must read the whole board again.
+    """
 
-        return f"Task(id={self.id}, desc=`{desc}{'...' if len(self.description) > self.max_len_desc else ''}`, status={self.status.name}, priority={self.priority.name})"
-    
-    def get_id(self):
-        Task.id_counter += 1
-        return Task.id_counter
-    
-    def set_task_db(self, task_db: 'TaskDB'):
-        self.task_db = task_db 
-    
-    def save(self) -> 'Self':
-        if (self.task_db is None) and not isinstance(self.task_db, TaskDB):
-            raise AttributeError('`task_db` must be not None, use `set_task_db`')
-         
-        self.task_db.add_task(self)
+    def __init__(self, task_db: TaskDB, capacity: int = 10000):
+        self.task_db = task_db
 
-        return self 
+        self.events: deque[TaskEvent] = deque(maxlen=capacity)
+        self.seq: int = 0
 
+        # listeners may be called from other threads than the subscribers' event loops
+        self.lock = threading.Lock()
+        self.waiters: set[tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
 
-class TaskDB:
+        task_db.add_listener(self)
 
-    def __init__(self):
-        self.tasks: list[Task] = []
+    def publish(self, op: str, task: Task):
+        with self.lock:
+            self.seq += 1
+            self.events.append(TaskEvent(self.seq, op, task.id, task.to_dict()))
+            waiters = list(self.waiters)
 
-    def add_task(self, task: Task):
-        self.tasks.append(task)
+        for loop, wakeup in waiters:
+            loop.call_soon_threadsafe(wakeup.set)
 
-    def create(
-        self, 
-        description: str,
-        priority: Priority,
-        status: Status = Status.NOT_STARTED
-    ) -> Task:
-        
-        task = Task(description=description, priority=priority, status=status)
-        task.set_task_db(task_db=self)
+    def task_added(self, task: Task):
+        self.publish("create", task)
 
-        return task 
-    
-    def list(self):
-        return self.tasks
-    
-    def __repr__(self):
-        
-        tasks_list_repr = ",\n".join([
-            "\t" + repr(task) for task in self.list()
-        ])
+    def task_updated(self, task: Task, before: Optional[dict]):
+        self.publish("update", task)
 
-        return f"{self.__class__.__name__}([\n{tasks_list_repr}\n])"
+    def task_deleted(self, task: Task):
+        self.publish("delete", task)
+
+    @property
+    def oldest(self) -> int:
+        """ lowest `after` that `since` can resume from """
+        with self.lock:
+            return self.events[0].seq - 1 if self.events else self.seq
 
+    def since(self, after: int = 0, limit: Optional[int] = None) -> list[TaskEvent]:
+        """ events with `seq > after`, oldest first """
+        with self.lock:
+            first = self.events[0].seq if self.events else self.seq + 1
+            if after < first - 1:
+                raise LookupError(f"events after {after} are no longer kept, the oldest is {first}.")
+
+            start = max(after - first + 1, 0)
+            stop = None if limit is None else start + limit
+            return list(islice(self.events, start, stop))
+
+    async def subscribe(self, after: Optional[int] = None):
+        """ yields events with `seq > after` as they happen; `after=None` starts from now """
+        wakeup = asyncio.Event()
+        waiter = (asyncio.get_running_loop(), wakeup)
+
+        with self.lock:
+            if after is None:
+                after = self.seq
+            self.waiters.add(waiter)
+
+        try:
+            while True:
+                # cleared before reading, so an event published meanwhile wakes us up again
+                wakeup.clear()
+                for event in self.since(after):
+                    after = event.seq
+                    yield event
+                await wakeup.wait()
+        finally:
+            with self.lock:
+                self.waiters.discard(waiter)
+
+
+class TaskFile:
+    """ Streaming import / export of tasks as JSON Lines (`.jsonl`) or CSV (`.csv`).
+
+    Rows are read, validated and inserted batch by batch through generators,
+    so memory does not grow with the file size. Each row has `description`,
+    `priority` and optionally `status` (enum names) and `id`.
+    """
+
+    formats = ("jsonl", "csv")
+    fields = ("id", "description", "priority", "status", "version")
+
+    def __init__(self, path: str, format: Optional[str] = None):
+        self.path = path
+        self.format = format or os.path.splitext(path)[1].lstrip(".").lower()
+
+        if self.format not in self.formats:
+            raise ValueError(f"'format' must be one of {self.formats}, but '{self.format}' is found.")
+
+        # filled by `import_into`
+        self.imported: int = 0
+        self.rejected: list[tuple[int, str]] = []
+
+    def read(self):
+        """ CSV rows as dicts, JSON lines undecoded (see `parse`) """
+        with open(self.path, newline="", encoding="utf-8") as file:
+            if self.format == "csv":
+                yield from csv.DictReader(file)
+            else:
+                yield from file
+
+    def parse(self, records, keep_ids: bool = False):
+        """ yields valid tasks, invalid rows (malformed JSON included) are recorded in `self.rejected` """
+        for line, record in enumerate(records, start=1):
+            try:
+                if isinstance(record, str):
+                    if not record.strip():
+                        continue
+                    record = json.loads(record)
+
+                task = Task(
+                    description=record.get("description"),
+                    priority=Priority[str(record.get("priority")).upper()],
+                    status=Status[str(record.get("status") or Status.NOT_STARTED.name).upper()],
+                    id=int(record["id"]) if keep_ids and record.get("id") else None
+                )
+            except (KeyError, ValueError, TypeError, AttributeError) as error:
+                self.rejected.append((line, str(error)))
+                continue
+
+            yield task
+
+    def import_into(self, task_db: TaskDB, batch_size: int = 10_000, keep_ids: bool = False) -> int:
+        tasks = self.parse(self.read(), keep_ids=keep_ids)
+
+        while batch := list(islice(tasks, batch_size)):
+            task_db.add_tasks(batch)
+            self.imported += len(batch)
+
+        return self.imported
+
+    def export_from(self, task_db: TaskDB) -> int:
+        exported = 0
+
+        with open(self.path, "w", newline="", encoding="utf-8") as file:
+            if self.format == "csv":
+                writer = csv.DictWriter(file, fieldnames=self.fields)
+                writer.writeheader()
+                for task in task_db.list():
+                    writer.writerow(task.to_dict())
+                    exported += 1
+            else:
+                for task in task_db.list():
+                    file.write(json.dumps(task.to_dict()) + "\n")
+                    exported += 1
+
+        return exported
+
+
+class Metrics:
+    """ Opt-in counters, latency histograms and gauges, exported as JSON or text.
+
+    `instrument(obj, names, prefix)` replaces the listed methods of one object
+    by timed wrappers, so code that is never instrumented pays nothing. Each
+    call is counted in a histogram named `<prefix>.<method>` (seconds, cumulative
+    `le` buckets), failures in the counter `<prefix>.<method>.errors`. Gauges are
+    functions read at export time only.
+    """
+
+    # upper bounds of the latency buckets in seconds, the last bucket is +inf
+    buckets: tuple = tuple(float(f"{base}e{exponent}") for exponent in range(-6, 1) for base in (1, 2.5, 5))
+
+    task_db_methods = (
+        "add_task", "add_tasks", "get", "get_by_description", "has_description",
+        "query", "update_task", "update_tasks", "delete_task", "delete_tasks"
+    )
+
+    def __init__(self, path: Optional[str] = None):
+        # written by `flush`, as JSON when it ends with ".json", as text otherwise
+        self.path = path
+
+        self.counters: dict[str, int] = {}
+        self.histograms: dict[str, list[int]] = {}
+        self.sums: dict[str, float] = {}
+        self.gauges: dict[str, callable] = {}
+
+        self.lock = threading.Lock()
+
+    def count(self, name: str, value: int = 1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name: str, seconds: float):
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = [0] * (len(self.buckets) + 1)
+                self.sums[name] = 0.0
+            histogram[bisect_left(self.buckets, seconds)] += 1
+            self.sums[name] += seconds
+
+    def gauge(self, name: str, read):
+        self.gauges[name] = read
+
+    def timed(self, name: str, func):
+        clock = time.perf_counter
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                self.count(name + ".errors")
+                raise
+            finally:
+                self.observe(name, clock() - start)
+
+        return wrapper
+
+    def instrument(self, obj, names, prefix: str):
+        for name in names:
+            if hasattr(obj, name):
+                setattr(obj, name, self.timed(f"{prefix}.{name}", getattr(obj, name)))
+
+    def instrument_task_db(self, task_db: TaskDB):
+        # gauges are counted, not queried: they are read after every action
+        self.gauge("tasks", lambda: len(task_db))
+        for status in Status:
+            self.gauge(f"tasks.{status.name}", lambda status=status: task_db.count_tasks(status=status))
+
+        self.instrument(task_db, self.task_db_methods, "task_db")
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            histograms = {
+                name: {
+                    "count": sum(histogram),
+                    "sum": self.sums[name],
+                    # cumulative counts, as in the Prometheus text format
+                    "buckets": dict(zip([*map(str, self.buckets), "+Inf"], accumulate(histogram)))
+                }
+                for name, histogram in self.histograms.items()
+            }
+            counters = dict(self.counters)
+
+        return {
+            "counters": counters,
+            "gauges": {name: read() for name, read in self.gauges.items()},
+            "histograms": histograms,
+        }
+
+    def to_text(self) -> str:
+        snapshot = self.snapshot()
+        lines = []
+
+        for name, value in snapshot["counters"].items():
+            lines.append(f"{name} {value}")
+        for name, value in snapshot["gauges"].items():
+            lines.append(f"{name} {value}")
+        for name, histogram in snapshot["histograms"].items():
+            for bound, value in histogram["buckets"].items():
+                lines.append(f'{name}_bucket{{le="{bound}"}} {value}')
+            lines.append(f"{name}_count {histogram['count']}")
+            lines.append(f"{name}_sum {histogram['sum']:.6f}")
+
+        return "\n".join(lines) + "\n"
+
+    def flush(self):
+        if self.path is None:
+            return
+
+        content = json.dumps(self.snapshot(), indent=2) if self.path.endswith(".json") else self.to_text()
+
+        # readers never see a half written file
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as file:
+            file.write(content)
+        os.replace(tmp_path, self.path)
+
+
+class Profiler:
+    """ `with Profiler("report.txt"):` runs a session under cProfile and tracemalloc and writes
+    the slowest functions and the biggest allocation sites to the report, even if it ends with `exit()` """
+
+    def __init__(self, path: str, limit: int = 30):
+        self.path = path
+        self.limit = limit
+        self.profile = cProfile.Profile()
+
+    def __enter__(self):
+        tracemalloc.start()
+        self.profile.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profile.disable()
+        allocations = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        with open(self.path, "w") as report:
+            stats = pstats.Stats(self.profile, stream=report)
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.limit)
+
+            report.write(f"tracemalloc: {current / 2**20:.1f} MB still allocated, {peak / 2**20:.1f} MB at peak\n\n")
+            for stat in allocations.statistics("lineno")[:self.limit]:
+                report.write(f"{stat}\n")
+
+        return False
 
 
 class Interface:
@@ -139,14 +2397,96 @@ class Logger:
         ... 
 
 
+class Terminal:
+    """ Draws frames of text with ANSI escape sequences, rewriting only the rows that changed.
+
+    `rows` is what the screen shows from the top, one entry per physical row
+    (long lines wrap). `draw` compares the new frame with it, rewrites the
+    changed rows, clears what is left below and sends it all in one write.
+    `read` asks for input below the frame and keeps the echoed answer as part
+    of it. An unknown screen, a resized one, or a frame taller than the
+    screen is redrawn whole.
+    """
+
+    clear_screen = "\x1b[H\x1b[2J"
+    clear_line = "\x1b[K"
+    clear_below = "\x1b[J"
+
+    # set once VT processing is on in a Windows console
+    vt_enabled: bool = False
+
+    def __init__(self):
+        # None until the first frame: the screen holds whatever was there before
+        self.rows: Optional[list[str]] = None
+        self.size = shutil.get_terminal_size()
+
+        if sys.platform == "win32" and not Terminal.vt_enabled:
+            # an empty `os.system` enables VT processing in the console, which keeps it for later terminals
+            os.system("")
+            Terminal.vt_enabled = True
+
+    @staticmethod
+    def wrap(line: str, width: int) -> list[str]:
+        return [line[start:start + width] for start in range(0, len(line), width)] or [""]
+
+    @staticmethod
+    def move(row: int) -> str:
+        return f"\x1b[{row};1H"
+
+    def physical_rows(self, lines) -> list[str]:
+        return [row for line in lines for row in self.wrap(line, self.size.columns)]
+
+    def draw(self, lines):
+        size = shutil.get_terminal_size()
+        if size != self.size:
+            self.size, self.rows = size, None
+
+        rows = self.physical_rows(lines)
+
+        if self.rows is None or len(rows) >= size.lines:
+            frame = self.clear_screen + "".join(row + "\n" for row in rows)
+        else:
+            frame = "".join(
+                self.move(number) + row + self.clear_line
+                for number, row in enumerate(rows, start=1)
+                if number > len(self.rows) or self.rows[number - 1] != row
+            ) + self.move(len(rows) + 1) + self.clear_below
+
+        # a frame taller than the screen scrolled, its rows are not where they were drawn
+        self.rows = rows if len(rows) < size.lines else None
+
+        sys.stdout.write(frame)
+        sys.stdout.flush()
+
+    def read(self, prompt: str) -> str:
+        answer = input(prompt)
+
+        if self.rows is not None:
+            self.rows += self.physical_rows((prompt + answer).split("\n"))
+            if len(self.rows) >= self.size.lines:
+                self.rows = None
+
+        return answer
+
+
 class CMDLogger(Logger):
     """" This class is used to handle all prints of `CDMInterface` """
 
     def __init__(self, os: OS = OS.LINUX):
         super().__init__()
 
+        if not isinstance(os, OS):
+            raise ValueError("'os' must be a 'OS' option.")
+
         self.os = os 
 
+        # escape sequences work on both, `os` is kept for callers
+        self.terminal = Terminal()
+
+        # the frame being built, drawn in one write before the next prompt
+        self.lines: list[str] = []
+        self.pending: bool = False
+
         self.bar_length: int = 30
  
         self.messages = {
@@ -157,6 +2497,11 @@ class CMDLogger(Logger):
                                     "   1. Create a task",
                                     "   2. Modify & update a task",
                                     "   3. List all tasks",
+                                    "   4. Import tasks (.jsonl / .csv)",
+                                    "   5. Export tasks (.jsonl / .csv)",
+                                    "   6. Search tasks",
+                                    "   7. Undo",
+                                    "   8. Redo",
                                     "   0. Exit",
                                     self.add_bar(length=self.bar_length),
                                 ]),
@@ -165,7 +2510,25 @@ class CMDLogger(Logger):
             "task_desc": "Task Desciprion: ",
             "task_priority": "Choose the task priority (0. LOW, 1. Medium, 2. High): ",
             "task_created": "Task is created: ",
-            "tasks_list": "Tasks"
+            "tasks_list": "Tasks",
+            "tasks_page": "Tasks {first}-{last} of {total}",
+            "page_command": "n. Next page, p. Previous page, s. Page size, 0. Back: ",
+            "page_size": "Tasks per page: ",
+            "file_path": "File path (.jsonl / .csv): ",
+            "invalid_file": "Cannot use this file: ",
+            "tasks_imported": "Tasks imported: ",
+            "tasks_rejected": "Rows rejected: ",
+            "tasks_exported": "Tasks exported: ",
+            "search_query": "Search: ",
+            "search_results": "Results",
+            "search_empty": "No task found.",
+            "similar_tasks": "Similar tasks already exist:",
+            "create_anyway": "Create it anyway? (y/N): ",
+            "task_not_created": "Task is not created.",
+            "undone": "Undone: ",
+            "redone": "Redone: ",
+            "nothing_to_undo": "Nothing to undo.",
+            "nothing_to_redo": "Nothing to redo."
         }   
     
     def add_bar(self, length):
@@ -174,18 +2537,31 @@ class CMDLogger(Logger):
     def log(self, *message, msg: str = None):
         
         msgkw = self.messages.get(msg, "")
-        print("\n".join(list(message) + [msgkw]))
+        self.write_lines("\n".join(list(message) + [msgkw]).split("\n"))
+
+    def write_lines(self, lines):
+        """ adds `lines` to the frame """
+        self.lines.extend(lines)
+        self.pending = True
+
+    def show(self):
+        """ draws the frame if it changed since it was last drawn """
+        if self.pending:
+            self.terminal.draw(self.lines)
+            self.pending = False
+
+    def read(self, prompt: str) -> str:
+        self.show()
+        answer = self.terminal.read(prompt)
+        self.lines.extend((prompt + answer).split("\n"))
+        return answer
 
     def continue_(self):
-        input("\nContinue...")
+        self.read("\nContinue...")
 
     def clear(self):
-        if self.os is OS.LINUX:
-            os.system("clear")
-        elif self.os is OS.WINDOWS:
-            os.system("cls")
-        else:
-            raise ValueError("'os' must be a 'OS' option.")
+        self.lines = []
+        self.pending = True
 
     def menu_option_cls(self):
         self.clear()
@@ -202,7 +2578,7 @@ class CMDReader:
     def read_option(self, msg: str, enum: Enum) -> Optional[Enum]:
 
         try:
-            inpt = input(msg)
+            inpt = self.logger.read(msg)
             option = enum(int(inpt))
             return option
         except:
@@ -217,7 +2593,25 @@ class CMDReader:
         )
     
     def get_descr(self):
-        return input(self.logger.messages["task_desc"])
+        return self.logger.read(self.logger.messages["task_desc"])
+
+    def get_path(self):
+        return self.logger.read(self.logger.messages["file_path"]).strip()
+
+    def get_search_query(self):
+        return self.logger.read(self.logger.messages["search_query"])
+
+    def get_page_command(self) -> str:
+        return self.logger.read(self.logger.messages["page_command"]).strip().lower()
+
+    def get_page_size(self) -> Optional[int]:
+        try:
+            return max(int(self.logger.read(self.logger.messages["page_size"])), 1)
+        except ValueError:
+            return None
+
+    def confirm(self, msg: str) -> bool:
+        return self.logger.read(self.logger.messages[msg]).strip().upper() == "Y"
 
     def get_priority(self) -> Optional[Priority]:
         return self.read_option(
@@ -227,20 +2621,59 @@ class CMDReader:
 
 class CMDInterface(Interface):
 
-    def __init__(self, task_db: TaskDB, os: OS = OS.LINUX):
+    menu_actions = ("create_task", "update_task", "list_all_tasks", "import_tasks", "export_tasks", "search_tasks", "undo", "redo")
+
+    def __init__(self, task_db: TaskDB, os: OS = OS.LINUX, metrics: Optional[Metrics] = None):
         super().__init__()
 
         self.task_db = task_db
 
+        # only instrumented when given, the methods are left untouched otherwise
+        self.metrics = metrics
+        if metrics is not None:
+            metrics.instrument_task_db(task_db)
+            metrics.instrument(self, self.menu_actions, "menu")
+
         self.logger = CMDLogger(os=os)
         self.reader = CMDReader(logger= self.logger)
 
         self.running: bool = True  
+
+        self.page_size: int = 20
+
+        # records changes from the start, so it cannot be built lazily
+        self.journal = TaskJournal(self.task_db)
+
+        # built on first use
+        self.search_index: Optional[SearchIndex] = None
+        self.duplicate_detector: Optional[DuplicateDetector] = None
+
+    def exit(self):
+        if self.metrics is not None:
+            self.metrics.flush()
+        self.task_db.close()
+        super().exit()
     
     def create_task(self):
         self.logger.clear()
 
         desc = self.reader.get_descr()
+
+        if self.duplicate_detector is None:
+            self.duplicate_detector = DuplicateDetector(self.task_db)
+
+        similar = self.duplicate_detector.similar(desc)
+
+        if similar:
+            self.logger.log(
+                self.logger.messages["similar_tasks"],
+                "\n".join([f"{similarity:.0%}  {task!r}" for task, similarity in similar[:5]])
+            )
+            if not self.reader.confirm("create_anyway"):
+                self.logger.log(self.logger.messages["task_not_created"])
+                self.logger.continue_()
+                return
+
         priority = self.reader.get_priority()
 
         if priority is not None:
@@ -261,15 +2694,101 @@ class CMDInterface(Interface):
         self.logger.clear()
 
     def list_all_tasks(self):
+        cursor = TaskCursor(self.task_db, page_size=self.page_size)
+
+        while True:
+            self.logger.clear()
+
+            tasks = cursor.page()
+            total = len(self.task_db)
+
+            self.logger.log(
+                self.logger.messages["tasks_page"].format(
+                    first=cursor.offset + 1 if tasks else 0, last=cursor.offset + len(tasks), total=total
+                ),
+                self.logger.add_bar(100)
+            )
+            self.logger.write_lines(repr(task) for task in tasks)
+            self.logger.log(self.logger.add_bar(100))
+
+            command = self.reader.get_page_command()
+
+            if command == "n":
+                if cursor.offset + cursor.page_size < total:
+                    cursor.next()
+            elif command == "p":
+                cursor.prev()
+            elif command == "s":
+                page_size = self.reader.get_page_size()
+                if page_size is not None:
+                    self.page_size = page_size
+                    cursor.resize(page_size)
+            elif command == "0":
+                return
+
+    def import_tasks(self):
+        self.logger.clear()
+
+        try:
+            task_file = TaskFile(self.reader.get_path())
+            task_file.import_into(self.task_db)
+        except (OSError, ValueError) as error:
+            self.logger.log(self.logger.messages["invalid_file"] + str(error))
+        else:
+            self.logger.log(
+                self.logger.messages["tasks_imported"] + str(task_file.imported),
+                self.logger.messages["tasks_rejected"] + str(len(task_file.rejected))
+            )
+
+        self.logger.continue_()
+
+    def export_tasks(self):
+        self.logger.clear()
+
+        try:
+            exported = TaskFile(self.reader.get_path()).export_from(self.task_db)
+        except (OSError, ValueError) as error:
+            self.logger.log(self.logger.messages["invalid_file"] + str(error))
+        else:
+            self.logger.log(self.logger.messages["tasks_exported"] + str(exported))
+
+        self.logger.continue_()
+
+    def search_tasks(self):
         self.logger.clear()
 
+        if self.search_index is None:
+            self.search_index = SearchIndex(self.task_db)
+
+        tasks = self.search_index.search(self.reader.get_search_query())
+
         self.logger.log(
-            self.logger.messages["tasks_list"], self.logger.add_bar(100),
-            "\n".join([
-                repr(task) for task in self.task_db.list()
-            ])
+            self.logger.messages["search_results"], self.logger.add_bar(100),
+            "\n".join([repr(task) for task in tasks]) or self.logger.messages["search_empty"]
         )
-        
+
+        self.logger.continue_()
+
+    def undo(self):
+        self.replay_journal(self.journal.undo, "undone", "nothing_to_undo")
+
+    def redo(self):
+        self.replay_journal(self.journal.redo, "redone", "nothing_to_redo")
+
+    def replay_journal(self, replay, done: str, empty: str):
+        self.logger.clear()
+
+        try:
+            delta = replay()
+        except KeyError as error:
+            self.logger.log(self.logger.messages["invalid_option"], str(error))
+        else:
+            if delta is None:
+                self.logger.log(msg=empty)
+            else:
+                op, id, _ = delta
+                self.logger.log(self.logger.messages[done] + f"{op} of task {id}")
+
         self.logger.continue_()
 
     def run(self):
@@ -292,36 +2811,843 @@ class CMDInterface(Interface):
 
                 if option is MenuOption.SHOW:
                     self.list_all_tasks()
+
+                if option is MenuOption.IMPORT:
+                    self.import_tasks()
+
+                if option is MenuOption.EXPORT:
+                    self.export_tasks()
+
+                if option is MenuOption.SEARCH:
+                    self.search_tasks()
+
+                if option is MenuOption.UNDO:
+                    self.undo()
+
+                if option is MenuOption.REDO:
+                    self.redo()
                 
                 if option is MenuOption.EXIT:
                     self.exit()
 
+                if self.metrics is not None:
+                    self.metrics.flush()
+
                 self.logger.menu_option_cls()
 
             else:
                 self.logger.menu_option_cls()
                 self.logger.log(msg="invalid_option")
 
+class CommandParser(argparse.ArgumentParser):
+    """ Reports a bad command with `ValueError` instead of exiting, so one bad line does not end a stream.
+
+    Nothing is printed either: the output is the stream of JSON results.
+    """
+
+    def error(self, message):
+        raise ValueError(message)
+
+    def exit(self, status=0, message=None):
+        raise ValueError(message or f"the command exited with status {status}")
+
+    def print_help(self, file=None):
+        raise ValueError("no help in a command stream, see BatchInterface")
+
+
+class BatchInterface(Interface):
+    """ Headless command mode: no prompt, no screen, one JSON line out per command.
+
+        add DESCRIPTION --priority P [--status S]
+        update ID [--description D] [--priority P] [--status S] [--version N]
+        delete ID
+        list [--offset N] [--limit N]
+        query [--status S[,S]] [--priority P[,P]] [--limit N]
+        run [FILE]                         a command stream from FILE, or stdin with `-`
+
+    A stream holds one command per line, either in the argv form above or as
+    a JSON object with an `op` key (`{"op": "add", "description": ..., "priority": "HIGH"}`);
+    blank lines and `#` comments are skipped. JSON lines are the fast form, the
+    argv form goes through argparse line by line. Each result is
+    `{"line", "ok", "task" | "tasks" | "error"}`. Consecutive adds, updates or
+    deletes are applied as one batch of up to `batch_size` commands, so a long
+    stream runs at the speed of the batch APIs of `TaskDB`.
+    """
+
+    commands = ("add", "update", "delete", "list", "query", "run")
+    batch_size: int = 10_000
+
+    def __init__(self, task_db: TaskDB, out=None):
+        super().__init__()
+
+        self.task_db = task_db
+        self.out = out or sys.stdout
+        self.parser = self.command_parser()
+
+        # staged writes of one kind: `(line, id or task, patch)`
+        self.pending_op: Optional[str] = None
+        self.pending: list[tuple] = []
+        self.pending_ids: set[int] = set()
+
+        self.failed: int = 0
+
+    @staticmethod
+    def command_parser() -> CommandParser:
+        # `-h` would print into the results and exit, it is an unknown argument instead
+        parser = CommandParser(prog="todo_oop_jamor.py", description="headless task commands", add_help=False)
+        commands = parser.add_subparsers(dest="op", required=True)
+
+        add = commands.add_parser("add", add_help=False)
+        add.add_argument("description")
+        add.add_argument("--priority", required=True)
+        add.add_argument("--status")
+
+        update = commands.add_parser("update", add_help=False)
+        update.add_argument("id", type=int)
+        update.add_argument("--description")
+        update.add_argument("--priority")
+        update.add_argument("--status")
+        update.add_argument("--version", type=int)
+
+        delete = commands.add_parser("delete", add_help=False)
+        delete.add_argument("id", type=int)
+
+        list_ = commands.add_parser("list", add_help=False)
+        list_.add_argument("--offset", type=int)
+        list_.add_argument("--limit", type=int)
+
+        query = commands.add_parser("query", add_help=False)
+        query.add_argument("--status")
+        query.add_argument("--priority")
+        query.add_argument("--limit", type=int)
+
+        run = commands.add_parser("run", add_help=False)
+        run.add_argument("path", nargs="?", default="-")
+
+        return parser
+
+    def parse(self, tokens: list[str]) -> dict:
+        arguments = vars(self.parser.parse_args(tokens))
+        return {name: value for name, value in arguments.items() if value is not None}
+
+    def run(self, argv: list[str]) -> int:
+        """ runs one argv command, or the stream named by `run`; returns the exit status """
+        try:
+            try:
+                command = self.parse(argv)
+            except ValueError as error:
+                command = error
+
+            if isinstance(command, dict) and command["op"] == "run":
+                if command["path"] == "-":
+                    self.execute(self.read(sys.stdin))
+                else:
+                    try:
+                        file = open(command["path"], encoding="utf-8")
+                    except OSError as error:
+                        # no line of the stream was read
+                        self.emit(0, error=str(error))
+                    else:
+                        with file:
+                            self.execute(self.read(file))
+            else:
+                self.execute([(1, command)])
+        finally:
+            try:
+                # commands staged before an unexpected error are still applied and reported
+                self.flush()
+            finally:
+                self.out.flush()
+                self.task_db.close()
+
+        return 1 if self.failed else 0
+
+    def read(self, lines):
+        """ yields `(line number, command)`, the command being a dict or the `ValueError` rejecting it """
+        for number, line in enumerate(lines, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+
+            try:
+                command = json.loads(line) if line.startswith("{") else self.parse(shlex.split(line))
+            except ValueError as error:
+                command = error
+
+            yield number, command
+
+    def execute(self, commands):
+        for number, command in commands:
+            try:
+                if isinstance(command, ValueError):
+                    raise command
+
+                op = command.get("op")
+                if op == "add":
+                    self.stage(op, number, self.new_task(command), None)
+                elif op == "update":
+                    self.stage(op, number, int(command["id"]), self.patch(command))
+                elif op == "delete":
+                    self.stage(op, number, int(command["id"]), None)
+                elif op == "list":
+                    self.flush()
+                    self.emit(number, **self.list_tasks(command))
+                elif op == "query":
+                    self.flush()
+                    self.emit(number, **self.query_tasks(command))
+                else:
+                    raise ValueError(f"'op' must be one of {self.commands[:-1]}, but '{op}' is found.")
+            except KeyError as error:
+                self.flush()
+                self.emit(number, error=f"missing field {error}")
+            except (ValueError, TypeError, AttributeError) as error:
+                # results stay in input order
+                self.flush()
+                self.emit(number, error=str(error))
+
+        self.flush()
+
+    def emit(self, number: int, error: Optional[str] = None, **result):
+        if error is not None:
+            self.failed += 1
+            result = {"line": number, "ok": False, "error": error}
+        else:
+            result = {"line": number, "ok": True, **result}
+
+        self.out.write(json.dumps(result) + "\n")
+
+    def stage(self, op: str, number: int, target, patch: Optional[dict]):
+        # a batch only touches a task once, so every result reflects its own command
+        if op != self.pending_op or len(self.pending) >= self.batch_size or target in self.pending_ids:
+            self.flush()
+            self.pending_op = op
+
+        self.pending.append((number, target, patch))
+        if op != "add":
+            self.pending_ids.add(target)
+
+    def flush(self):
+        if not self.pending:
+            return
+
+        op, pending = self.pending_op, self.pending
+        self.pending_op, self.pending, self.pending_ids = None, [], set()
+
+        if op == "add":
+            self.task_db.add_tasks([task for _, task, _ in pending])
+            for number, task, _ in pending:
+                self.emit(number, task=task.to_dict())
+
+        elif op == "update":
+            results = self.task_db.update_tasks([(id, patch) for _, id, patch in pending])
+            for (number, id, _), (_, error) in zip(pending, results):
+                if error is None:
+                    self.emit(number, task=self.task_db.get(id).to_dict())
+                else:
+                    self.emit(number, error=error)
+
+        else:
+            deleted = {task.id: task for task in self.task_db.delete_tasks([id for _, id, _ in pending])}
+            for number, id, _ in pending:
+                if id in deleted:
+                    self.emit(number, task=deleted[id].to_dict())
+                else:
+                    self.emit(number, error=f"no task with id {id}")
+
+    @staticmethod
+    def member(name, enum: type[Enum]):
+        try:
+            return enum[str(name).strip().upper()]
+        except KeyError:
+            raise ValueError(f"'{name}' is not one of {[member.name for member in enum]}") from None
+
+    def members(self, value, enum: type[Enum]) -> Optional[list]:
+        """ `"HIGH"`, `"LOW,MEDIUM"` or `["LOW", "MEDIUM"]` -> enum members """
+        if value is None:
+            return None
+        names = value.split(",") if isinstance(value, str) else value
+        return [self.member(name, enum) for name in names]
+
+    def new_task(self, command: dict) -> Task:
+        return Task(
+            description=command["description"],
+            priority=self.member(command["priority"], Priority),
+            status=self.member(command.get("status") or Status.NOT_STARTED.name, Status)
+        )
+
+    def patch(self, command: dict) -> dict:
+        patch = {
+            name: command[name] for name in ("description", "priority", "status", "version")
+            if command.get(name) is not None
+        }
+        if "priority" in patch:
+            patch["priority"] = self.member(patch["priority"], Priority)
+        if "status" in patch:
+            patch["status"] = self.member(patch["status"], Status)
+        return patch
+
+    def list_tasks(self, command: dict) -> dict:
+        offset = int(command.get("offset", 0))
+        limit = command.get("limit")
+        stop = None if limit is None else offset + int(limit)
+
+        tasks = [task.to_dict() for task in islice(self.task_db.list(), offset, stop)]
+        return {"tasks": tasks}
+
+    def query_tasks(self, command: dict) -> dict:
+        tasks = self.task_db.query(
+            status=self.members(command.get("status"), Status),
+            priority=self.members(command.get("priority"), Priority),
+            limit=command.get("limit")
+        )
+        return {"tasks": [task.to_dict() for task in tasks]}
+
+
+if QtCore is not None:
+
+    class TaskTableModel(QtCore.QAbstractTableModel):
+        """ Qt table model over `TaskRows`: rows are fetched as the view scrolls and
+        only the drawn cells are read. Description, priority and status are editable.
+        """
+
+        def __init__(self, task_db: TaskDB, parent=None, fetch_size: int = 10_000):
+            super().__init__(parent)
+            self.rows = TaskRows(task_db, view=self, fetch_size=fetch_size)
+            # the first screen is there before the view asks for more
+            self.rows.fetch()
+
+        def close(self):
+            self.rows.close()
+
+        def rowCount(self, parent=QtCore.QModelIndex()) -> int:
+            return 0 if parent.isValid() else len(self.rows)
+
+        def columnCount(self, parent=QtCore.QModelIndex()) -> int:
+            return 0 if parent.isValid() else len(self.rows.columns)
+
+        def canFetchMore(self, parent) -> bool:
+            return not parent.isValid() and self.rows.can_fetch()
+
+        def fetchMore(self, parent):
+            if not parent.isValid():
+                self.rows.fetch()
+
+        def data(self, index, role=QtCore.Qt.DisplayRole):
+            if role not in (QtCore.Qt.DisplayRole, QtCore.Qt.EditRole) or not index.isValid():
+                return None
+            return self.rows.values(index.row())[index.column()]
+
+        def headerData(self, section: int, orientation, role=QtCore.Qt.DisplayRole):
+            if role != QtCore.Qt.DisplayRole:
+                return None
+            if orientation == QtCore.Qt.Horizontal:
+                return self.rows.columns[section]
+            return None
+
+        def flags(self, index):
+            flags = super().flags(index)
+            if index.isValid() and index.column() > 0:
+                flags |= QtCore.Qt.ItemIsEditable
+            return flags
+
+        def setData(self, index, value, role=QtCore.Qt.EditRole) -> bool:
+            if role != QtCore.Qt.EditRole or not index.isValid():
+                return False
+
+            task = self.rows.task_db.get(self.rows.ids[index.row()])
+            if task is None:
+                return False
+
+            # the row is redrawn through `TaskRows.task_updated`
+            try:
+                if index.column() == 1:
+                    self.rows.task_db.update_task(task, description=str(value))
+                elif index.column() == 2:
+                    self.rows.task_db.update_task(task, priority=Priority[str(value).strip().upper()])
+                elif index.column() == 3:
+                    self.rows.task_db.update_task(task, status=Status[str(value).strip().upper()])
+                else:
+                    return False
+            except (KeyError, ValueError):
+                return False
+
+            return True
+
+        # `TaskRows` view events
+
+        def rows_inserting(self, first: int, last: int):
+            self.beginInsertRows(QtCore.QModelIndex(), first, last)
+
+        def rows_inserted(self):
+            self.endInsertRows()
+
+        def rows_removing(self, first: int, last: int):
+            self.beginRemoveRows(QtCore.QModelIndex(), first, last)
+
+        def rows_removed(self):
+            self.endRemoveRows()
+
+        def row_changed(self, row: int):
+            self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.rows.columns) - 1))
+
+
 class QTInterface(Interface):
+    """ Table window over a `TaskDB`, see `TaskTableModel`.
 
-    def __init__(self):
+    Needs PySide6 or PyQt5. Runs headless with `QT_QPA_PLATFORM=offscreen`.
+    """
+
+    def __init__(self, task_db: TaskDB):
         super().__init__()
 
+        self.task_db = task_db
+        self.model = None
+        self.table = None
+        self.window = None
+
+    def build(self):
+        self.model = TaskTableModel(self.task_db)
+
+        self.table = table = QtWidgets.QTableView()
+        table.setModel(self.model)
+        table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        # fixed row heights: nothing is measured beyond the drawn rows
+        table.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
+        table.verticalHeader().hide()
+        table.horizontalHeader().setStretchLastSection(True)
+        table.setColumnWidth(1, 400)
+
+        description = QtWidgets.QLineEdit()
+        description.setPlaceholderText("Description")
+        priority = QtWidgets.QComboBox()
+        priority.addItems([member.name for member in Priority])
+        add = QtWidgets.QPushButton("Add")
+        delete = QtWidgets.QPushButton("Delete")
+
+        def add_task():
+            if description.text().strip():
+                self.task_db.create(description=description.text(), priority=Priority[priority.currentText()]).save()
+                description.clear()
+
+        def delete_tasks():
+            rows = {index.row() for index in table.selectionModel().selectedRows()}
+            self.task_db.delete_tasks([self.model.rows.ids[row] for row in rows])
+
+        add.clicked.connect(add_task)
+        description.returnPressed.connect(add_task)
+        delete.clicked.connect(delete_tasks)
+
+        form = QtWidgets.QHBoxLayout()
+        for widget in (description, priority, add, delete):
+            form.addWidget(widget)
+
+        layout = QtWidgets.QVBoxLayout()
+        layout.addLayout(form)
+        layout.addWidget(table)
+
+        self.window = QtWidgets.QWidget()
+        self.window.setLayout(layout)
+        self.window.setWindowTitle("Tasks")
+        self.window.resize(800, 600)
+
+        return self.window
+
     def run(self):
-        ... 
+        if QtWidgets is None:
+            raise ValueError("the Qt interface needs 'PySide6' or 'PyQt5', neither is installed.")
+
+        app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+
+        self.build().show()
+        self.start()
+        try:
+            return app.exec()
+        finally:
+            self.model.close()
+            self.task_db.close()
 
 
 class WebInterface(Interface):
+    """ HTTP/JSON API over a `TaskDB`, served by asyncio with the standard library only.
 
-    def __init__(self):
+        GET    /tasks?status=&priority=&offset=&limit=   list / query, paginated
+        POST   /tasks                                    create one task, or a list of tasks
+        GET    /tasks/<id>
+        PATCH  /tasks/<id>                               {"description", "priority", "status", "version"}
+        DELETE /tasks/<id>
+        POST   /batch                                    [{"method", "path", "body"}, ...] in one request
+        GET    /changes?after=&limit=                    change feed events after a sequence number (one worker only)
+        GET    /metrics                                  counters, histograms and gauges (JSON), when enabled
+
+    Priorities and statuses are given by name. A PATCH holding the `version`
+    the client read is a compare-and-set, answered 409 if the task changed
+    since. Connections are kept alive (HTTP/1.1) until the client closes them
+    or sends `Connection: close`.
+    """
+
+    max_page: int = 1000
+
+    def __init__(
+        self, task_db: TaskDB, host: str = "127.0.0.1", port: int = 8000, metrics: Optional[Metrics] = None
+    ):
         super().__init__()
 
-    def run(self):
-        pass 
+        self.task_db = task_db
+        self.metrics = metrics
+        if metrics is not None:
+            metrics.instrument_task_db(task_db)
+        self.host = host
+        self.port = port
+
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.processes: list[multiprocessing.Process] = []
+
+        # not kept with several workers, each would number only the changes it made itself
+        self.feed: Optional[ChangeFeed] = ChangeFeed(task_db)
+
+    def run(self, workers: int = 1):
+        """ with `workers` > 1, see `run_workers` """
+        if workers > 1:
+            return self.run_workers(workers)
+
+        self.start()
+        try:
+            asyncio.run(self.serve_forever())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if self.metrics is not None:
+                self.metrics.flush()
+            self.task_db.close()
+
+    def bind(self) -> socket.socket:
+        sock = socket.create_server((self.host, self.port))
+        # with port 0 the system picks a free port
+        self.port = sock.getsockname()[1]
+        return sock
+
+    def run_workers(self, workers: int, sock: Optional[socket.socket] = None):
+        """ Serves from `workers` processes sharing one listening socket and one SQLite file.
+
+        Every worker opens its own connection to the `SQLiteTaskDB` file: reads
+        run in parallel (WAL mode) and SQLite serialises the writes. Task ids
+        come from an `IdAllocator` whose high-water mark is shared through a
+        file, so workers never hand out the same id.
+        """
+        if not isinstance(self.task_db, SQLiteTaskDB):
+            raise ValueError(f"several workers need a 'SQLiteTaskDB', but {type(self.task_db)} is found.")
+
+        if not hasattr(os, "fork"):
+            raise ValueError("several workers need 'os.fork', which this platform does not have.")
+
+        sock = sock or self.bind()
+
+        # a SQLite connection must not cross a fork
+        self.task_db.close()
+
+        context = multiprocessing.get_context("fork")
+        self.processes = [
+            context.Process(target=self.run_worker, args=(self.task_db.path, sock), daemon=True)
+            for _ in range(workers)
+        ]
+
+        self.start()
+        for process in self.processes:
+            process.start()
+
+        try:
+            for process in self.processes:
+                process.join()
+        except KeyboardInterrupt:
+            self.stop_workers()
+        finally:
+            sock.close()
+
+    def stop_workers(self):
+        for process in self.processes:
+            process.terminate()
+
+    def run_worker(self, path: str, sock: socket.socket):
+        if Task.id_allocator.path is None:
+            Task.id_allocator = IdAllocator(path=path + ".ids")
+
+        self.task_db = SQLiteTaskDB(path)
+        self.feed = None
+        if self.metrics is not None:
+            # each worker exports its own metrics
+            if self.metrics.path is not None:
+                root, extension = os.path.splitext(self.metrics.path)
+                self.metrics.path = f"{root}.{os.getpid()}{extension}"
+            self.metrics.instrument_task_db(self.task_db)
+        try:
+            asyncio.run(self.serve_forever(sock=sock))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if self.metrics is not None:
+                self.metrics.flush()
+            self.task_db.close()
+
+    async def open(self, sock: Optional[socket.socket] = None) -> asyncio.AbstractServer:
+        if sock is None:
+            sock = self.bind()
+        self.server = await asyncio.start_server(self.handle_connection, sock=sock)
+        return self.server
+
+    async def serve_forever(self, sock: Optional[socket.socket] = None):
+        server = await self.open(sock=sock)
+        async with server:
+            await server.serve_forever()
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request = await self.read_request(reader)
+                if request is None:
+                    break
+
+                method, target, headers, body = request
+                status, payload = self.dispatch(method, target, body)
+
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(self.response(status, payload, keep_alive))
+                await writer.drain()
+
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def read_request(self, reader: asyncio.StreamReader) -> Optional[tuple]:
+        line = await reader.readline()
+        if not line:
+            return None
+
+        method, target, _ = line.decode("latin-1").split(" ", 2)
+
+        headers = {}
+        while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get("content-length", 0))
+        body = await reader.readexactly(length) if length else b""
+
+        return method.upper(), target, headers, body
+
+    def response(self, status: HTTPStatus, payload, keep_alive: bool) -> bytes:
+        body = json.dumps(payload).encode("utf-8")
+
+        head = (
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+
+        return head.encode("latin-1") + body
+
+    def dispatch(self, method: str, target: str, body) -> tuple[HTTPStatus, object]:
+        """ `body` is raw bytes from the socket, or already decoded JSON inside a batch """
+        url = urlsplit(target)
+        parts = [part for part in url.path.split("/") if part]
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+
+        try:
+            if isinstance(body, bytes):
+                body = json.loads(body) if body else None
+
+            if parts == ["tasks"] and method == "GET":
+                return self.list_tasks(params)
+            if parts == ["tasks"] and method == "POST":
+                return self.create_tasks(body)
+            if parts == ["batch"] and method == "POST":
+                return self.batch(body)
+            if parts == ["changes"] and method == "GET":
+                return self.changes(params)
+            if parts == ["metrics"] and method == "GET" and self.metrics is not None:
+                return HTTPStatus.OK, self.metrics.snapshot()
+            if len(parts) == 2 and parts[0] == "tasks":
+                id = int(parts[1])
+                if method == "GET":
+                    return self.get_task(id)
+                if method == "PATCH":
+                    return self.update_task(id, body)
+                if method == "DELETE":
+                    return self.delete_task(id)
+                return HTTPStatus.METHOD_NOT_ALLOWED, {"error": f"{method} is not allowed on {url.path}"}
+        except KeyError as error:
+            # enum names are looked up by `member`, a KeyError is a field missing from the body
+            return HTTPStatus.BAD_REQUEST, {"error": f"missing field {error}"}
+        except (ValueError, TypeError, AttributeError) as error:
+            return HTTPStatus.BAD_REQUEST, {"error": str(error)}
+        except sqlite3.OperationalError as error:
+            # another worker held the write lock for longer than the timeout
+            return HTTPStatus.SERVICE_UNAVAILABLE, {"error": str(error)}
+
+        return HTTPStatus.NOT_FOUND, {"error": f"no route for {method} {url.path}"}
+
+    @staticmethod
+    def member(name, enum: type[Enum]):
+        try:
+            return enum[str(name).strip().upper()]
+        except KeyError:
+            raise ValueError(f"'{name}' is not one of {[member.name for member in enum]}") from None
+
+    def members(self, value: Optional[str], enum: type[Enum]):
+        """ `"HIGH"` or `"LOW,MEDIUM"` -> enum members """
+        if value is None:
+            return None
+        return [self.member(name, enum) for name in value.split(",")]
+
+    @staticmethod
+    def whole_number(params: dict, name: str, default: int, minimum: int = 0) -> int:
+        value = params.get(name, default)
+        try:
+            number = int(value)
+        except ValueError:
+            number = minimum - 1
+        if number < minimum:
+            raise ValueError(f"'{name}' must be a whole number of {minimum} or more, but '{value}' is found.")
+        return number
+
+    def changes(self, params: dict) -> tuple[HTTPStatus, object]:
+        if self.feed is None:
+            # a client resuming on another worker would read another sequence
+            return HTTPStatus.NOT_IMPLEMENTED, {"error": "the change feed needs a single worker."}
+
+        after = self.whole_number(params, "after", 0)
+        limit = min(self.whole_number(params, "limit", self.max_page, minimum=1), self.max_page)
+
+        try:
+            events = self.feed.since(after, limit=limit)
+        except LookupError as error:
+            return HTTPStatus.GONE, {"error": str(error), "oldest": self.feed.oldest}
+
+        return HTTPStatus.OK, {
+            "events": [event.to_dict() for event in events],
+            "seq": events[-1].seq if events else after
+        }
+
+    def list_tasks(self, params: dict) -> tuple[HTTPStatus, object]:
+        offset = self.whole_number(params, "offset", 0)
+        # a limit of 0 would hand out the same `next_offset` forever
+        limit = min(self.whole_number(params, "limit", 50, minimum=1), self.max_page)
+        status = self.members(params.get("status"), Status)
+        priority = self.members(params.get("priority"), Priority)
+
+        if status is None and priority is None:
+            tasks = list(islice(self.task_db.list(), offset, offset + limit + 1))
+        else:
+            tasks = self.task_db.query(status=status, priority=priority, limit=offset + limit + 1)[offset:]
+
+        return HTTPStatus.OK, {
+            "tasks": [task.to_dict() for task in tasks[:limit]],
+            "next_offset": offset + limit if len(tasks) > limit else None,
+        }
+
+    def create_tasks(self, body) -> tuple[HTTPStatus, object]:
+        records = body if isinstance(body, list) else [body]
+
+        tasks = []
+        for record in records:
+            task = Task(
+                description=record["description"],
+                priority=self.member(record["priority"], Priority),
+                status=self.member(record.get("status", Status.NOT_STARTED.name), Status)
+            )
+            tasks.append(task)
+
+        self.task_db.add_tasks(tasks)
+
+        created = [task.to_dict() for task in tasks]
+        return HTTPStatus.CREATED, created if isinstance(body, list) else created[0]
+
+    def get_task(self, id: int) -> tuple[HTTPStatus, object]:
+        task = self.task_db.get(id)
+        if task is None:
+            return HTTPStatus.NOT_FOUND, {"error": f"no task with id {id}"}
+        return HTTPStatus.OK, task.to_dict()
+
+    def update_task(self, id: int, body: dict) -> tuple[HTTPStatus, object]:
+        patch = dict(body)
+        if "priority" in patch:
+            patch["priority"] = self.member(patch["priority"], Priority)
+        if "status" in patch:
+            patch["status"] = self.member(patch["status"], Status)
+
+        ((_, error),) = self.task_db.update_tasks({id: patch})
+        if error is not None:
+            task = self.task_db.get(id)
+            if task is None:
+                status = HTTPStatus.NOT_FOUND
+            elif patch.get("version") is not None and patch["version"] != task.version:
+                status = HTTPStatus.CONFLICT
+            else:
+                status = HTTPStatus.BAD_REQUEST
+            return status, {"error": error}
+
+        return self.get_task(id)
+
+    def delete_task(self, id: int) -> tuple[HTTPStatus, object]:
+        task = self.task_db.delete_task(id)
+        if task is None:
+            return HTTPStatus.NOT_FOUND, {"error": f"no task with id {id}"}
+        return HTTPStatus.OK, task.to_dict()
+
+    def batch(self, body: list) -> tuple[HTTPStatus, object]:
+        results = []
+        for request in body:
+            status, payload = self.dispatch(request["method"].upper(), request["path"], request.get("body"))
+            results.append({"status": status.value, "body": payload})
+        return HTTPStatus.OK, results
 
 
 if __name__ == "__main__":
 
-    task_db = TaskDB()
-    cmd = CMDInterface(task_db=task_db, os=OS.WINDOWS)
-    cmd.run()
+    if sys.argv[1:2] and sys.argv[1] in BatchInterface.commands:
+        # headless: `add "buy milk" --priority HIGH`, `run commands.jsonl`, ...
+        Task.id_allocator = IdAllocator(path="tasks.ids")
+        task_db = TaskDB(storage=LogStorage("tasks", sync_mode=SyncMode.GROUP))
+        sys.exit(BatchInterface(task_db=task_db).run(sys.argv[1:]))
+
+    parser = argparse.ArgumentParser(epilog=f"headless commands: {', '.join(BatchInterface.commands)} (see BatchInterface)")
+    parser.add_argument("interface", nargs="?", choices=("cmd", "web", "qt"), default="cmd")
+    parser.add_argument(
+        "workers", nargs="?", type=int, default=1,
+        help="web server processes; with more than one the tasks are served from tasks.sqlite instead of "
+             "tasks.log, copied from tasks.log when tasks.sqlite is empty (later changes are not shared)"
+    )
+    parser.add_argument("--metrics", metavar="PATH", help="instrument the session, export metrics to PATH (.json or text)")
+    parser.add_argument("--profile", metavar="PATH", help="run the session under cProfile / tracemalloc, report to PATH")
+    args = parser.parse_args()
+
+    Task.id_allocator = IdAllocator(path="tasks.ids")
+
+    metrics = Metrics(path=args.metrics) if args.metrics else None
+
+    if args.interface == "web":
+        if args.workers > 1:
+            # processes can only share the SQLite file: the first run starts from the board of the other modes
+            task_db = SQLiteTaskDB("tasks.sqlite")
+            if not len(task_db):
+                task_db.add_tasks(map(Task.from_dict, LogStorage("tasks").load()))
+        else:
+            task_db = TaskDB(storage=LogStorage("tasks", sync_mode=SyncMode.GROUP))
+        interface = WebInterface(task_db=task_db, metrics=metrics)
+        session = lambda: interface.run(workers=args.workers)
+    elif args.interface == "qt":
+        interface = QTInterface(task_db=TaskDB(storage=LogStorage("tasks")))
+        session = interface.run
+    else:
+        task_db = TaskDB(storage=LogStorage("tasks"))
+        interface = CMDInterface(task_db=task_db, os=OS.WINDOWS, metrics=metrics)
+        session = interface.run
+
+    if args.profile:
+        with Profiler(args.profile):
+            session()
+    else:
+        session()